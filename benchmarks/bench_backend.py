@@ -0,0 +1,89 @@
+""" Loading frames and the catalog in src/backend. """
+
+import pytest
+
+from src.backend import catalog, data_functions
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    def set_backend(name: str):
+        monkeypatch.setattr(data_functions, "DATA_BACKEND", name)
+
+    return set_backend
+
+
+def bench_get_dataframe_cold(benchmark, frame_key, backend):
+    backend("csv")
+
+    def load():
+        data_functions.clear_cache()
+        return data_functions.get_dataframe(frame_key["semester"], frame_key["beruf"])
+
+    assert len(benchmark(load)) > 0
+
+
+def bench_get_dataframe_cached(benchmark, frame_key, backend):
+    backend("csv")
+    data_functions.get_dataframe(frame_key["semester"], frame_key["beruf"])
+    assert (
+        len(
+            benchmark(
+                data_functions.get_dataframe, frame_key["semester"], frame_key["beruf"]
+            )
+        )
+        > 0
+    )
+
+
+def bench_get_dataframe_arrow(benchmark, frame_key, backend):
+    backend("arrow")
+    assert (
+        len(
+            benchmark(
+                data_functions.get_dataframe, frame_key["semester"], frame_key["beruf"]
+            )
+        )
+        > 0
+    )
+
+
+def bench_get_dataframe_arrow_one_column(benchmark, frame_key, backend):
+    backend("arrow")
+    df = benchmark(
+        data_functions.get_dataframe,
+        frame_key["semester"],
+        frame_key["beruf"],
+        ["Standort"],
+    )
+    assert list(df.columns) == ["Standort"]
+
+
+def bench_build_catalog(benchmark, data_path):
+    result = benchmark.pedantic(
+        catalog.build_catalog, args=(catalog.CSV_DATA_PATH,), rounds=3, iterations=1
+    )
+    assert result["semesters"]
+
+
+def bench_get_all_semesters(benchmark, data_path, scale):
+    assert len(benchmark(data_functions.get_all_semesters)) == scale["semesters"]
+
+
+def bench_get_beruf_options(benchmark, frame_key, scale):
+    assert (
+        len(benchmark(data_functions.get_beruf_options, frame_key["semester"]))
+        == scale["berufe"]
+    )
+
+
+def bench_compare_semesters(benchmark, frame_key, backend):
+    backend("csv")
+    semesters = data_functions.get_beruf_semesters(frame_key["beruf"])
+
+    def compare():
+        return data_functions.compare_semesters(
+            frame_key["beruf"], semesters[0], semesters[-1]
+        )
+
+    assert len(benchmark(compare)) > 0
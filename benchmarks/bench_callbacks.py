@@ -0,0 +1,84 @@
+""" The Dash callbacks of the data page, called directly without a browser. """
+
+
+def bench_update_table(benchmark, app, frame_key, triggered):
+    triggered("frame-key.data")
+    data, columns, page_count, selected_rows, table_view = benchmark(
+        app.update_table, frame_key, "Bestehensquote", 0, 20, [], "", None
+    )
+    assert len(data) == 20 and selected_rows == list(range(20))
+
+
+def bench_update_table_sorted_filtered(benchmark, app, frame_key, triggered):
+    triggered("beruf-table.filter_query")
+    sort_by = [{"column_id": "Anzahl Teilnehmer", "direction": "asc"}]
+    benchmark(
+        app.update_table,
+        frame_key,
+        "Bestehensquote",
+        1,
+        20,
+        sort_by,
+        "{Bestehensquote} < 80",
+        None,
+    )
+
+
+def bench_update_plot_new_frame(benchmark, app, frame_key, triggered):
+    """A new (semester, beruf) builds the full figure, the figure cache is cleared every round."""
+    triggered("frame-key.data")
+
+    def build():
+        app.figure_cache.clear()
+        return app.update_plot(frame_key, "Bestehensquote", [], "")
+
+    assert "data" in benchmark(build)
+
+
+def bench_update_plot_cached(benchmark, app, frame_key, triggered):
+    triggered("frame-key.data")
+    app.update_plot(frame_key, "Bestehensquote", [], "")
+    assert "data" in benchmark(app.update_plot, frame_key, "Bestehensquote", [], "")
+
+
+def bench_update_plot_patch(benchmark, app, frame_key, triggered):
+    """Changing the column only patches the bars."""
+    triggered("column-dropdown.value")
+    benchmark(app.update_plot, frame_key, "ø Gesamtpunktzahl", [], "")
+
+
+def bench_set_column_options(benchmark, app, frame_key, triggered):
+    triggered("frame-key.data")
+    assert len(benchmark(app.set_column_options, frame_key)) > 0
+
+
+def bench_update_selection_new_frame(benchmark, app, frame_key, triggered):
+    triggered("frame-key.data")
+    selection = benchmark(
+        app.update_selection, frame_key, [], [], None, 0, [], "", None
+    )
+    assert len(selection["standorte"]) > 0
+
+
+def bench_update_selection_click(benchmark, app, frame_key, triggered):
+    """Deselecting the first row of the page merges the page into the selection of the whole frame."""
+    triggered("frame-key.data")
+    data, _, _, selected_rows, table_view = app.update_table(
+        frame_key, "Bestehensquote", 0, 20, [], "", None
+    )
+    selection = app.update_selection(
+        frame_key, selected_rows, data, table_view, 0, [], "", None
+    )
+    triggered("beruf-table.selected_rows")
+    updated = benchmark(
+        app.update_selection,
+        frame_key,
+        selected_rows[1:],
+        data,
+        table_view,
+        0,
+        [],
+        "",
+        selection,
+    )
+    assert data[0]["Standort"] not in updated["standorte"]
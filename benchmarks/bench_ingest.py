@@ -0,0 +1,38 @@
+""" Parsing and converting the IHK exports. """
+
+import glob
+import os
+
+import xls_parser
+
+
+def first_export(data_path: str) -> str:
+    return sorted(glob.glob(os.path.join(data_path, "xls_data", "*", "*", "*.xls")))[0]
+
+
+def bench_parse_dataframe(benchmark, converter, data_path):
+    df, modules = benchmark(converter.parse_dataframe, first_export(data_path))
+    assert "Note 6 in Prozent" in df.columns
+
+
+def bench_parse_xls(benchmark, data_path):
+    df, modules = benchmark(xls_parser.parse_xls, first_export(data_path))
+    assert "Note 6 in Prozent" in df.columns
+
+
+def bench_convert_run(benchmark, converter, data_path, scale):
+    written = benchmark.pedantic(
+        converter.run,
+        args=(os.path.join(data_path, "xls_data"),),
+        kwargs={"force": True},
+        rounds=3,
+        iterations=1,
+    )
+    assert len(written) == scale["berufe"] * scale["semesters"]
+
+
+def bench_convert_run_up_to_date(benchmark, converter, data_path):
+    """A second run without changed xls files only checks the mtimes."""
+    converter.run(os.path.join(data_path, "xls_data"))
+    written = benchmark(converter.run, os.path.join(data_path, "xls_data"))
+    assert written == []
@@ -0,0 +1,132 @@
+""" Fixtures of the benchmark suite.
+
+The benchmarks run on synthetic data in a temporary folder, the paths of the
+converter and the backend are pointed to it for the whole session. The scale is
+set with --berufe, --standorte and --semesters.
+"""
+
+import importlib
+import os
+import sys
+
+import pytest
+
+ROOT_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT_PATH)
+sys.path.append(os.path.join(ROOT_PATH, "src", "data_acquisition"))
+sys.path.append(os.path.join(ROOT_PATH, "src", "frontend"))
+sys.path.append(os.path.dirname(__file__))
+
+import synthetic
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("synthetic data")
+    group.addoption("--berufe", type=int, default=4, help="Number of synthetic Berufe")
+    group.addoption(
+        "--standorte",
+        type=int,
+        default=80,
+        help="Number of synthetic Standorte per Beruf",
+    )
+    group.addoption(
+        "--semesters", type=int, default=6, help="Number of synthetic semesters"
+    )
+
+
+@pytest.fixture(scope="session")
+def scale(pytestconfig) -> dict:
+    return {
+        name: pytestconfig.getoption(name)
+        for name in ("berufe", "standorte", "semesters")
+    }
+
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    # stored with every result, so only runs of the same scale are compared
+    machine_info["synthetic_scale"] = {
+        name: config.getoption(name) for name in ("berufe", "standorte", "semesters")
+    }
+
+
+@pytest.fixture(scope="session")
+def data_path(tmp_path_factory, scale) -> str:
+    """Synthetic xls and csv trees with the catalog, aggregates and Arrow file the backend reads."""
+    from src.backend import aggregates, arrow_store, catalog, data_functions
+
+    path = str(tmp_path_factory.mktemp("ihk"))
+    synthetic.write_xls_tree(path, **scale)
+    csv_path = synthetic.write_csv_tree(path, **scale)
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(catalog, "CSV_DATA_PATH", csv_path)
+        monkeypatch.setattr(catalog, "CATALOG_PATH", os.path.join(path, "catalog.json"))
+        monkeypatch.setattr(data_functions, "CSV_DATA_PATH", csv_path)
+        monkeypatch.setattr(
+            data_functions, "MODULES_DATA_PATH", os.path.join(path, "modules_data")
+        )
+        monkeypatch.setattr(
+            aggregates, "AGGREGATES_PATH", os.path.join(path, "aggregates.csv")
+        )
+        monkeypatch.setattr(
+            arrow_store, "ARROW_DATA_PATH", os.path.join(path, "stats.arrow")
+        )
+        monkeypatch.setenv(
+            "IHK_BACKGROUND_CACHE_PATH", os.path.join(path, "cache", "background")
+        )
+
+        converter = importlib.import_module("2_convert_xls_to_csv")
+        monkeypatch.setattr(
+            converter, "CSV_DATA_PATH", os.path.join(path, "converted_csv_data")
+        )
+        monkeypatch.setattr(
+            converter, "MODULES_DATA_PATH", os.path.join(path, "modules_data")
+        )
+
+        catalog.write_catalog(catalog.build_catalog(csv_path), catalog.CATALOG_PATH)
+        tree = converter.load_csv_tree(csv_path)
+        aggregates.write_aggregates(
+            aggregates.build_aggregates(tree), aggregates.AGGREGATES_PATH
+        )
+        arrow_store.write_arrow_file(tree, arrow_store.ARROW_DATA_PATH)
+        yield path
+
+
+@pytest.fixture(scope="session")
+def converter(data_path):
+    return importlib.import_module("2_convert_xls_to_csv")
+
+
+@pytest.fixture(scope="session")
+def frame_key(data_path) -> dict:
+    """The (semester, beruf) shown first on the data page."""
+    from src.backend.data_functions import get_all_semesters, get_berufe_for_semester
+
+    semester = get_all_semesters()[0]
+    return {"semester": semester, "beruf": get_berufe_for_semester(semester)[0]}
+
+
+@pytest.fixture(scope="session")
+def app(data_path):
+    return importlib.import_module("app")
+
+
+@pytest.fixture
+def triggered():
+    """Set the callback context, so callbacks can be called directly as if prop_id triggered them."""
+    from dash._callback_context import context_value
+    from dash._utils import AttributeDict
+
+    def set_context(prop_id: str | None = None):
+        context_value.set(
+            AttributeDict(
+                triggered_inputs=[{"prop_id": prop_id, "value": None}]
+                if prop_id
+                else [],
+                inputs_list=[],
+                states_list=[],
+                outputs_list=[],
+            )
+        )
+
+    return set_context
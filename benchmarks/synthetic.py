@@ -0,0 +1,176 @@
+""" Synthetic IHK-shaped data for the benchmarks.
+
+Writes exports in the format of the IHK website (html tables saved as .xls, one file
+per Standort) and csv files in the format of 2_convert_xls_to_csv.py for a configurable
+number of Berufe, Standorte and semesters:
+
+    python benchmarks/synthetic.py /tmp/ihk --berufe 10 --standorte 80 --semesters 20
+"""
+
+import argparse
+import os
+import random
+
+import pandas as pd
+
+GRADES = range(1, 7)
+STATISTIC_LABELS = [
+    "Anzahl Teilnehmer",
+    "davon bestanden",
+    "Bestehensquote",
+    "ø Gesamtpunktzahl",
+] + [
+    label for grade in GRADES for label in (f"Note {grade}", f"Note {grade} in Prozent")
+]
+MODULES = [
+    "Planen eines Softwareproduktes",
+    "Entwicklung und Umsetzung von Algorithmen",
+    "Wirtschafts- und Sozialkunde",
+]
+STANDORT_NAMES = [
+    "Aachen",
+    "Berlin",
+    "Köln",
+    "München und Oberbayern",
+    "Region Stuttgart",
+    "Hamburg",
+    "Leipzig",
+    "Trier",
+]
+
+
+def semester_names(count: int) -> list[str]:
+    """The newest `count` semesters, 20242, 20234, 20232, ..."""
+    semesters = []
+    year, term = 2024, 2
+    while len(semesters) < count:
+        semesters.append(f"{year}{term}")
+        year, term = (year, 2) if term == 4 else (year - 1, 4)
+    return semesters
+
+
+def beruf_names(count: int) -> list[str]:
+    return [f"Synthetischer-Beruf-{i}" for i in range(count)]
+
+
+def standort_names(count: int) -> list[str]:
+    names = [
+        f"{STANDORT_NAMES[i % len(STANDORT_NAMES)]} {i // len(STANDORT_NAMES)}".strip()
+        for i in range(count)
+    ]
+    return [name.removesuffix(" 0") for name in names]
+
+
+def random_statistics(rng: random.Random) -> dict:
+    participants = rng.randint(0, 400)
+    grades = [rng.randint(0, participants // 3 + 1) for _ in GRADES]
+    passed = min(participants, sum(grades[:4]))
+    statistics = {
+        "Anzahl Teilnehmer": participants,
+        "davon bestanden": passed,
+        "Bestehensquote": round(passed / participants * 100, 1)
+        if participants
+        else 0.0,
+        "ø Gesamtpunktzahl": float(rng.randint(40, 95)),
+    }
+    for grade, count in zip(GRADES, grades):
+        statistics[f"Note {grade}"] = count
+        statistics[f"Note {grade} in Prozent"] = (
+            round(count / participants * 100, 1) if participants else 0.0
+        )
+    return statistics
+
+
+def german_number(value: float | int) -> str:
+    """Format like the exports: 1.234 for counts and 94,5 for percentages."""
+    if isinstance(value, int):
+        return f"{value:,}".replace(",", ".")
+    return f"{value:,.1f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def export_html(standort: str, statistics: dict, national: dict) -> str:
+    """An export of one Standort next to the bundesweit values, as the website writes it."""
+    rows = [
+        ["Prüfungsstatistik", "", "", ""],
+        ["Termin", "", "", ""],
+        ["Merkmal", f"IHK {standort}", "bundesweit", ""],
+    ]
+    for label in STATISTIC_LABELS:
+        rows.append(
+            [
+                label,
+                german_number(statistics[label]),
+                german_number(national[label]),
+                "",
+            ]
+        )
+    for module in MODULES:
+        rows.append([module, "70", "68", ""])
+    body = "".join(
+        "<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>" for row in rows
+    )
+    return f"<table>{body}</table>"
+
+
+def write_xls_tree(
+    path: str, berufe: int, standorte: int, semesters: int, seed: int = 0
+) -> str:
+    """Write the exports as xls_data/<semester>/<beruf>/<standort>.xls and return the xls_data folder."""
+    rng = random.Random(seed)
+    xls_path = os.path.join(path, "xls_data")
+    for semester in semester_names(semesters):
+        for beruf in beruf_names(berufe):
+            beruf_folder = os.path.join(xls_path, semester, beruf)
+            os.makedirs(beruf_folder, exist_ok=True)
+            national = random_statistics(rng)
+            for standort in standort_names(standorte):
+                with open(
+                    os.path.join(beruf_folder, f"{standort}.xls"),
+                    "w",
+                    encoding="cp1252",
+                ) as f:
+                    f.write(export_html(standort, random_statistics(rng), national))
+    return xls_path
+
+
+def write_csv_tree(
+    path: str, berufe: int, standorte: int, semesters: int, seed: int = 0
+) -> str:
+    """Write converted csv files as csv_data/<semester>/<beruf>.csv and return the csv_data folder."""
+    rng = random.Random(seed)
+    csv_path = os.path.join(path, "csv_data")
+    for semester in semester_names(semesters):
+        os.makedirs(os.path.join(csv_path, semester), exist_ok=True)
+        for beruf in beruf_names(berufe):
+            rows = [
+                {"Standort": standort, **random_statistics(rng)}
+                for standort in sorted(standort_names(standorte) + ["bundesweit"])
+            ]
+            pd.DataFrame(rows).to_csv(
+                os.path.join(csv_path, semester, f"{beruf}.csv"), index=False
+            )
+    return csv_path
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", help="Folder for xls_data and csv_data")
+    parser.add_argument("--berufe", type=int, default=10)
+    parser.add_argument("--standorte", type=int, default=80)
+    parser.add_argument("--semesters", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(
+        write_xls_tree(
+            args.path, args.berufe, args.standorte, args.semesters, args.seed
+        )
+    )
+    print(
+        write_csv_tree(
+            args.path, args.berufe, args.standorte, args.semesters, args.seed
+        )
+    )
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.backend.catalog import DATA_PATH
+
+AGGREGATES_PATH = os.path.join(DATA_PATH, "aggregates.csv")
+
+# scope of the aggregate over all IHK Standorte
+NATIONAL_SCOPE = "bundesweit"
+
+GRADES = range(1, 7)
+COUNT_COLUMNS = ["Anzahl Teilnehmer", "davon bestanden"] + [
+    f"Note {grade}" for grade in GRADES
+]
+PERCENT_COLUMNS = ["Bestehensquote"] + [f"Note {grade} in Prozent" for grade in GRADES]
+POINTS_COLUMN = "ø Gesamtpunktzahl"
+# columns that are comparable between a Standort and an aggregate
+AVERAGE_COLUMNS = PERCENT_COLUMNS + [POINTS_COLUMN]
+
+# Bundesland of every IHK Standort (names as in the converted csv files)
+STANDORT_BUNDESLAND = {
+    "Aachen": "Nordrhein-Westfalen",
+    "Arnsberg Hellweg - Sauerland": "Nordrhein-Westfalen",
+    "Aschaffenburg": "Bayern",
+    "Berlin": "Berlin",
+    "Bodensee-Oberschwaben": "Baden-Württemberg",
+    "Bonn / Rhein-Sieg": "Nordrhein-Westfalen",
+    "Braunschweig": "Niedersachsen",
+    "Bremen": "Bremen",
+    "Bremerhaven": "Bremen",
+    "Chemnitz": "Sachsen",
+    "Coburg": "Bayern",
+    "Cottbus": "Brandenburg",
+    "Darmstadt": "Hessen",
+    "Dortmund": "Nordrhein-Westfalen",
+    "Dresden": "Sachsen",
+    "Düsseldorf": "Nordrhein-Westfalen",
+    "Erfurt": "Thüringen",
+    "Essen, Mülheim an der Ruhr, Oberhausen zu Essen": "Nordrhein-Westfalen",
+    "Flensburg": "Schleswig-Holstein",
+    "Frankfurt am Main": "Hessen",
+    "Fulda": "Hessen",
+    "Gießen-Friedberg": "Hessen",
+    "Halle-Dessau": "Sachsen-Anhalt",
+    "Hamburg": "Hamburg",
+    "Hanau-Gelnhausen-Schlüchtern": "Hessen",
+    "Hannover": "Niedersachsen",
+    "Heilbronn - Franken": "Baden-Württemberg",
+    "Hochrhein-Bodensee": "Baden-Württemberg",
+    "Karlsruhe": "Baden-Württemberg",
+    "Kassel-Marburg": "Hessen",
+    "Kiel": "Schleswig-Holstein",
+    "Koblenz": "Rheinland-Pfalz",
+    "Köln": "Nordrhein-Westfalen",
+    "Lahn-Dill": "Hessen",
+    "Leipzig": "Sachsen",
+    "Limburg": "Hessen",
+    "Lippe zu Detmold": "Nordrhein-Westfalen",
+    "Lübeck": "Schleswig-Holstein",
+    "Lüneburg-Wolfsburg": "Niedersachsen",
+    "Magdeburg": "Sachsen-Anhalt",
+    "Mittlerer Niederrhein Krefeld-Mönchengladbach-Neuss": "Nordrhein-Westfalen",
+    "Mittleres Ruhrgebiet": "Nordrhein-Westfalen",
+    "München und Oberbayern": "Bayern",
+    "Neubrandenburg für das östliche Mecklenburg-Vorpommern": "Mecklenburg-Vorpommern",
+    "Niederbayern in Passau": "Bayern",
+    "Niederrheinische Duisburg-Wesel-Kleve zu Duisburg": "Nordrhein-Westfalen",
+    "Nord Westfalen": "Nordrhein-Westfalen",
+    "Nordschwarzwald": "Baden-Württemberg",
+    "Nürnberg für Mittelfranken": "Bayern",
+    "Oberfranken Bayreuth": "Bayern",
+    "Offenbach am Main": "Hessen",
+    "Oldenburgische Industrie- und Handelskammer": "Niedersachsen",
+    "Osnabrück-Emsland": "Niedersachsen",
+    "Ostbrandenburg": "Brandenburg",
+    "Ostfriesland und Papenburg": "Niedersachsen",
+    "Ostthüringen zu Gera": "Thüringen",
+    "Ostwestfalen zu Bielefeld": "Nordrhein-Westfalen",
+    "Ostwürttemberg": "Baden-Württemberg",
+    "Potsdam": "Brandenburg",
+    "Regensburg für Oberpfalz / Kelheim": "Bayern",
+    "Region Stuttgart": "Baden-Württemberg",
+    "Reutlingen": "Baden-Württemberg",
+    "Rhein-Neckar": "Baden-Württemberg",
+    "Rheinhessen": "Rheinland-Pfalz",
+    "Rostock": "Mecklenburg-Vorpommern",
+    "Saarland": "Saarland",
+    "Schwaben": "Bayern",
+    "Schwarzwald-Baar-Heuberg": "Baden-Württemberg",
+    "Schwerin": "Mecklenburg-Vorpommern",
+    "Siegen": "Nordrhein-Westfalen",
+    "Stade für den Elbe-Weser-Raum": "Niedersachsen",
+    "Südlicher Oberrhein": "Baden-Württemberg",
+    "Südthüringen": "Thüringen",
+    "Südwestfälische Hagen": "Nordrhein-Westfalen",
+    "Trier": "Rheinland-Pfalz",
+    "Ulm": "Baden-Württemberg",
+    "Wiesbaden": "Hessen",
+    "Wuppertal-Solingen-Remscheid": "Nordrhein-Westfalen",
+    "Würzburg-Schweinfurt": "Bayern",
+    "die Pfalz in Ludwigshafen am Rhein": "Rheinland-Pfalz",
+}
+
+_aggregates_lock = threading.Lock()
+_aggregates_state = {"signature": None, "aggregates": None}
+
+
+def get_bundesland(standort: str) -> str | None:
+    return STANDORT_BUNDESLAND.get(standort)
+
+
+def _aggregate(df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    """
+    Sum the counts of df per keys and derive the participant-weighted percentages and points.
+    """
+    df = df.assign(**{"Punkte gewichtet": df[POINTS_COLUMN] * df["Anzahl Teilnehmer"]})
+    grouped = df.groupby(keys, observed=True)
+    sums = grouped[COUNT_COLUMNS + ["Punkte gewichtet"]].sum()
+    sums.insert(0, "Anzahl Standorte", grouped.size())
+
+    # weighted by the number of participants, which is the same as the rate of the summed counts
+    participants = sums["Anzahl Teilnehmer"].where(sums["Anzahl Teilnehmer"] > 0)
+    sums["Bestehensquote"] = sums["davon bestanden"] / participants * 100
+    sums[POINTS_COLUMN] = sums.pop("Punkte gewichtet") / participants
+    for grade in GRADES:
+        sums[f"Note {grade} in Prozent"] = sums[f"Note {grade}"] / participants * 100
+    sums[AVERAGE_COLUMNS] = sums[AVERAGE_COLUMNS].fillna(0).round(1)
+    return sums.reset_index()
+
+
+def build_aggregates(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the aggregates of the long frame of all csv files (columns semester, beruf, Standort, ...).
+
+    Returns one row per (semester, beruf, scope): the scope "bundesweit" sums all IHK
+    Standorte, every other scope is a Bundesland. The "bundesweit" row of the exports is not
+    part of the sums, so the national and the regional aggregates are built from the same rows.
+    Standorte without a Bundesland only count towards the national aggregate.
+    """
+    import pandas as pd
+
+    standorte = df[df["Standort"] != NATIONAL_SCOPE]
+    unknown = sorted(set(standorte["Standort"]) - set(STANDORT_BUNDESLAND))
+    if unknown:
+        print(
+            f"Standorte without Bundesland (only in the national aggregate): {unknown}"
+        )
+
+    national = _aggregate(standorte, ["semester", "beruf"])
+    national.insert(2, "scope", NATIONAL_SCOPE)
+    regional = _aggregate(
+        standorte.assign(scope=standorte["Standort"].map(STANDORT_BUNDESLAND)).dropna(
+            subset=["scope"]
+        ),
+        ["semester", "beruf", "scope"],
+    )
+    aggregates = pd.concat([national, regional], ignore_index=True)
+    return aggregates.sort_values(["semester", "beruf", "scope"], ignore_index=True)
+
+
+def write_aggregates(aggregates: pd.DataFrame, path: str = AGGREGATES_PATH) -> None:
+    """
+    Write the aggregates atomically, so a running dashboard never reads half a file.
+    """
+    tmp_path = f"{path}.tmp"
+    aggregates.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def load_aggregates() -> pd.DataFrame:
+    """
+    Get the aggregates indexed by (semester, beruf, scope), loaded once and kept in memory.
+
+    The file is only read again when its mtime or size changes. Without an aggregates
+    file an empty frame is returned.
+    """
+    try:
+        stat = os.stat(AGGREGATES_PATH)
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        signature = "missing"
+
+    import pandas as pd
+
+    with _aggregates_lock:
+        if _aggregates_state["signature"] != signature:
+            if signature == "missing":
+                aggregates = pd.DataFrame(
+                    columns=["semester", "beruf", "scope"]
+                    + COUNT_COLUMNS
+                    + AVERAGE_COLUMNS
+                ).astype(dict.fromkeys(COUNT_COLUMNS, "int64"))
+            else:
+                aggregates = pd.read_csv(
+                    AGGREGATES_PATH,
+                    dtype={"semester": str} | dict.fromkeys(COUNT_COLUMNS, "int64"),
+                )
+            _aggregates_state["aggregates"] = aggregates.set_index(
+                ["semester", "beruf", "scope"]
+            ).sort_index()
+            _aggregates_state["signature"] = signature
+        return _aggregates_state["aggregates"]
+
+
+def get_aggregate(
+    semester: str, beruf: str, scope: str = NATIONAL_SCOPE
+) -> dict | None:
+    """
+    Get the aggregate of a beruf in a semester for a scope ("bundesweit" or a Bundesland).
+    The beruf can be given with or without .csv.
+    """
+    key = (semester, beruf.removesuffix(".csv"), scope)
+    aggregates = load_aggregates()
+    if key not in aggregates.index:
+        return None
+    # a row of the frame would be a single float Series, the records keep the column dtypes
+    return aggregates.loc[[key]].to_dict("records")[0]
+
+
+def get_scope_aggregates(semester: str, beruf: str) -> pd.DataFrame:
+    """
+    Get the aggregates of all scopes of a beruf in a semester, indexed by scope.
+    The beruf can be given with or without .csv.
+    """
+    key = (semester, beruf.removesuffix(".csv"))
+    aggregates = load_aggregates()
+    if key not in aggregates.index.droplevel("scope"):
+        return aggregates.iloc[0:0].droplevel(["semester", "beruf"])
+    return aggregates.loc[key]
@@ -0,0 +1,148 @@
+""" Memory-mapped Arrow IPC file with the data of all semesters and berufe.
+
+The converter writes all csv files into one uncompressed Arrow IPC file
+(``2_convert_xls_to_csv.py --arrow``), sorted by semester and beruf. The row range
+of every (semester, beruf) is stored in the schema metadata, so a frame is a
+zero-copy slice of the memory-mapped table. The metadata also holds the catalog
+version the file was written for, a file left over from an older conversion run
+is not used. The pages of the file are shared by
+all processes through the page cache of the operating system, only the columns a
+caller asks for are converted to pandas.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from src.backend.catalog import DATA_PATH, load_catalog
+from src.backend.compact import compact_frame
+
+ARROW_DATA_PATH = os.path.join(DATA_PATH, "stats.arrow")
+# schema metadata key of the {"<semester>/<beruf>": [offset, length]} index
+INDEX_METADATA_KEY = b"ihk_index"
+# schema metadata key of the catalog version the file was written for
+VERSION_METADATA_KEY = b"ihk_catalog_version"
+
+_table_lock = threading.Lock()
+_table_state = {"signature": None, "table": None, "index": None, "version": None}
+
+
+def write_arrow_file(
+    df: pd.DataFrame, path: str = ARROW_DATA_PATH, catalog_version: str | None = None
+) -> None:
+    """
+    Write the long frame of all csv files (columns semester, beruf, Standort, ...) as Arrow IPC file.
+
+    The file is written uncompressed, so it can be memory-mapped without decoding,
+    and replaces the old file only when it is complete. catalog_version defaults to
+    the version of the current catalog, so write the catalog first.
+    """
+    import pyarrow as pa
+
+    if catalog_version is None:
+        catalog_version = load_catalog()["version"]
+
+    df = df.sort_values(["semester", "beruf"], kind="stable", ignore_index=True)
+    df["semester"] = df["semester"].astype(str)
+
+    index = {}
+    for (semester, beruf), rows in df.groupby(
+        ["semester", "beruf"], sort=False
+    ).indices.items():
+        index[f"{semester}/{beruf}"] = [int(rows[0]), len(rows)]
+
+    # dictionary-encoded Standort, semester and beruf and small integers, slices convert to compact frames
+    table = pa.Table.from_pandas(compact_frame(df), preserve_index=False)
+    table = table.replace_schema_metadata(
+        {
+            **(table.schema.metadata or {}),
+            INDEX_METADATA_KEY: json.dumps(index, ensure_ascii=False).encode("utf-8"),
+            VERSION_METADATA_KEY: catalog_version.encode("utf-8"),
+        }
+    )
+
+    tmp_path = f"{path}.tmp"
+    with pa.OSFile(tmp_path, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def open_table():
+    """
+    Get the memory-mapped table, its row index and its catalog version, opened once per process.
+
+    The file is mapped again when its mtime or size changes. Reading the table
+    only reads the metadata, the column buffers point into the mapped file.
+    """
+    import pyarrow as pa
+
+    stat = os.stat(ARROW_DATA_PATH)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _table_lock:
+        if _table_state["signature"] != signature:
+            source = pa.memory_map(ARROW_DATA_PATH, "r")
+            table = pa.ipc.open_file(source).read_all()
+            _table_state["table"] = table
+            _table_state["index"] = json.loads(
+                table.schema.metadata[INDEX_METADATA_KEY]
+            )
+            # files written before the version was stored have none and are never current
+            version = table.schema.metadata.get(VERSION_METADATA_KEY)
+            _table_state["version"] = version.decode("utf-8") if version else None
+            _table_state["signature"] = signature
+        return _table_state["table"], _table_state["index"], _table_state["version"]
+
+
+def has_arrow_file() -> bool:
+    return os.path.exists(ARROW_DATA_PATH)
+
+
+def is_current_arrow_file() -> bool:
+    """
+    Check if the Arrow file exists and was written for the current catalog version.
+    """
+    try:
+        version = open_table()[2]
+    except FileNotFoundError:
+        return False
+    return version == load_catalog()["version"]
+
+
+def get_slice(semester: str, beruf: str):
+    """
+    Get the rows of a beruf in a semester as zero-copy slice of the mapped table, None if it is missing.
+    """
+    table, index, _ = open_table()
+    row_range = index.get(f"{semester}/{beruf.removesuffix('.csv')}")
+    if row_range is None:
+        return None
+    offset, length = row_range
+    return table.slice(offset, length)
+
+
+def get_arrow_frame(
+    semester: str, beruf: str, columns: list[str] | None = None
+) -> pd.DataFrame:
+    """
+    Get the frame of a beruf in a semester with the same columns as its csv file.
+
+    Only the given columns (all csv columns if None) are converted to pandas.
+    Raises FileNotFoundError like reading a missing csv file would.
+    """
+    table_slice = get_slice(semester, beruf)
+    if table_slice is None:
+        raise FileNotFoundError(f"{semester}/{beruf} is not in {ARROW_DATA_PATH}")
+    if columns is None:
+        columns = [
+            name
+            for name in table_slice.column_names
+            if name not in ("semester", "beruf")
+        ]
+    return table_slice.select(columns).to_pandas()
@@ -0,0 +1,126 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import threading
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+CSV_DATA_PATH = os.path.join(DATA_PATH, "csv_data")
+CATALOG_PATH = os.path.join(DATA_PATH, "catalog.json")
+
+_catalog_lock = threading.Lock()
+_catalog_state = {"signature": None, "catalog": None}
+
+
+def beruf_label(slug: str) -> str:
+    """
+    Readable fallback name for a beruf slug (Kaufmann-Kauffrau-im-E-Commerce -> Kaufmann Kauffrau im E Commerce).
+    """
+    return slug.replace("-", " ")
+
+
+def build_catalog(
+    csv_path: str = CSV_DATA_PATH, beruf_names: dict[str, str] | None = None
+) -> dict:
+    """
+    Build the catalog of all converted csv files.
+
+    The catalog lists every semester (newest first) with its berufe. Each beruf
+    has its slug (file name without .csv), display name, csv file, row count,
+    columns and Standorte. beruf_names maps slugs to display names, slugs without
+    an entry fall back to beruf_label.
+    """
+    import pandas as pd
+
+    beruf_names = beruf_names or {}
+    semesters = {}
+    for semester_path in sorted(glob.glob(os.path.join(csv_path, "*")), reverse=True):
+        if not os.path.isdir(semester_path):
+            continue
+        semester = os.path.basename(semester_path)
+        berufe = {}
+        for path in sorted(glob.glob(os.path.join(semester_path, "*.csv"))):
+            slug = os.path.basename(path).removesuffix(".csv")
+            df = pd.read_csv(path)
+            berufe[slug] = {
+                "name": beruf_names.get(slug, beruf_label(slug)),
+                "file": f"{semester}/{slug}.csv",
+                "rows": len(df),
+                "columns": df.columns.tolist(),
+                "standorte": df["Standort"].tolist(),
+            }
+        semesters[semester] = {"berufe": berufe}
+
+    content = json.dumps(semesters, sort_keys=True, ensure_ascii=False)
+    return {
+        "version": hashlib.sha1(content.encode("utf-8")).hexdigest()[:12],
+        "semesters": semesters,
+    }
+
+
+def write_catalog(catalog: dict, path: str = CATALOG_PATH) -> None:
+    """
+    Write the catalog atomically, so a running dashboard never reads half a file.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(catalog, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp_path, path)
+
+
+def load_catalog() -> dict:
+    """
+    Get the catalog, loaded once and kept in memory.
+
+    The file is only read again when its mtime or size changes, so a new conversion
+    run is picked up without a restart. Without a catalog file the csv tree is
+    scanned once instead.
+    """
+    try:
+        stat = os.stat(CATALOG_PATH)
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        signature = "scanned"
+
+    with _catalog_lock:
+        if _catalog_state["signature"] != signature:
+            if signature == "scanned":
+                catalog = build_catalog()
+            else:
+                with open(CATALOG_PATH, encoding="utf-8") as f:
+                    catalog = json.load(f)
+            _catalog_state["catalog"] = catalog
+            _catalog_state["signature"] = signature
+        return _catalog_state["catalog"]
+
+
+def cached_per_version(func):
+    """
+    Cache the result of a function without arguments until the catalog version changes.
+    The result is shared between callers, so it must not be modified.
+    """
+    lock = threading.Lock()
+    state = {"version": None, "result": None}
+
+    @functools.wraps(func)
+    def wrapper():
+        version = load_catalog()["version"]
+        with lock:
+            if state["version"] != version:
+                state["result"] = func()
+                state["version"] = version
+            return state["result"]
+
+    return wrapper
+
+
+def get_catalog_entry(semester: str, beruf: str) -> dict | None:
+    """
+    Get the catalog entry of a beruf in a semester. The beruf can be given with or without .csv.
+    """
+    semester_entry = load_catalog()["semesters"].get(semester)
+    if semester_entry is None:
+        return None
+    return semester_entry["berufe"].get(beruf.removesuffix(".csv"))
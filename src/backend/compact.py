@@ -0,0 +1,107 @@
+""" Compact in-memory representation of the stats frames.
+
+Parsed csv files keep Standort as Python strings and every count as int64. The
+backend converts them once when they are loaded: Standort, semester and beruf become
+categoricals and the counts the smallest of int16 and int32 their values fit in.
+Standort uses the same categories (all Standorte of the catalog) in every frame, so
+frames of different semesters and berufe are concatenated without falling back to strings.
+
+Percentages and points stay float64, float32 would show up as 42.29999923706055 in the table.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from src.backend.catalog import cached_per_version, load_catalog
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+CATEGORY_COLUMNS = ["semester", "beruf"]
+INTEGER_TYPES = ["int16", "int32"]
+
+
+@cached_per_version
+def get_standort_dtype() -> pd.CategoricalDtype:
+    """
+    Categorical dtype of the Standorte of all semesters and berufe in the catalog, sorted by name.
+    """
+    import pandas as pd
+
+    standorte = set()
+    for semester_entry in load_catalog()["semesters"].values():
+        for entry in semester_entry["berufe"].values():
+            standorte.update(entry["standorte"])
+    return pd.CategoricalDtype(sorted(standorte))
+
+
+def smallest_integer_type(values: pd.Series) -> str | None:
+    """Smallest integer type of INTEGER_TYPES that holds all values, None if none does."""
+    import numpy as np
+
+    if values.empty:
+        return INTEGER_TYPES[0]
+    low, high = values.min(), values.max()
+    for integer_type in INTEGER_TYPES:
+        info = np.iinfo(integer_type)
+        if info.min <= low and high <= info.max:
+            return integer_type
+    return None
+
+
+def compact_frame(
+    df: pd.DataFrame, standort_dtype: pd.CategoricalDtype | None = None
+) -> pd.DataFrame:
+    """
+    Convert a frame to the compact representation.
+
+    Standort gets standort_dtype, Standorte that are not in it are added to its categories.
+    Without standort_dtype the categories are the Standorte of df.
+    """
+    import pandas as pd
+
+    df = df.copy()
+    if "Standort" in df.columns and not isinstance(
+        df["Standort"].dtype, pd.CategoricalDtype
+    ):
+        standorte = df["Standort"].astype(str)
+        if standort_dtype is None:
+            standort_dtype = pd.CategoricalDtype(sorted(set(standorte)))
+        missing = set(standorte) - set(standort_dtype.categories)
+        if missing:
+            standort_dtype = pd.CategoricalDtype(
+                sorted(set(standort_dtype.categories) | missing)
+            )
+        df["Standort"] = standorte.astype(standort_dtype)
+
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(str).astype("category")
+
+    for column in df.columns:
+        if pd.api.types.is_integer_dtype(df[column].dtype):
+            integer_type = smallest_integer_type(df[column])
+            if integer_type is not None:
+                df[column] = df[column].astype(integer_type)
+    return df
+
+
+def frame_memory(df: pd.DataFrame, shared_categories: bool = False) -> int:
+    """
+    Bytes of a frame including the Python strings of object columns.
+    With shared_categories the categories of categorical columns are not counted,
+    they are shared by all frames and exist only once.
+    """
+    import pandas as pd
+
+    if not shared_categories:
+        return int(df.memory_usage(deep=True, index=True).sum())
+    size = int(df.index.memory_usage(deep=True))
+    for column in df.columns:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            size += values.cat.codes.nbytes
+        else:
+            size += int(values.memory_usage(deep=True, index=False))
+    return size
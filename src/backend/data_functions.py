@@ -1,35 +1,446 @@
-import glob
+from __future__ import annotations
+
 import os
-import pandas as pd
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable
+
+from src.backend.arrow_store import (
+    ARROW_DATA_PATH,
+    get_arrow_frame,
+    is_current_arrow_file,
+)
+from src.backend.catalog import CSV_DATA_PATH, DATA_PATH, load_catalog
+from src.backend.compact import compact_frame, get_standort_dtype
+from src.backend.metrics import instrument, record_cache
+from src.backend.shared_cache import get_shared_cache
+
+# pandas is imported on first use, so the dashboard starts without it
+if TYPE_CHECKING:
+    import pandas as pd
+
+PARQUET_DATA_PATH = os.path.join(DATA_PATH, "parquet_data")
+MODULES_DATA_PATH = os.path.join(DATA_PATH, "modules_data")
+
+# maximum number of (semester, beruf) frames kept in memory per process,
+# keep it small with many workers and a shared cache (see shared_cache.py)
+DATAFRAME_CACHE_SIZE = int(os.environ.get("DATAFRAME_CACHE_SIZE", 64))
+# "csv" parses and caches the csv files per process, "arrow" reads slices
+# of the memory-mapped file written by 2_convert_xls_to_csv.py --arrow
+DATA_BACKEND = os.environ.get("IHK_DATA_BACKEND", "csv")
+# maximum number of berufe whose frames of all semesters are kept concatenated
+HISTORY_CACHE_SIZE = 16
+
+# columns compared between semesters on the Semestervergleich page
+COMPARISON_COLUMNS = ["Bestehensquote", "ø Gesamtpunktzahl"] + [
+    f"Note {grade} in Prozent" for grade in range(1, 7)
+]
+
+
+def uses_arrow_file() -> bool:
+    """
+    Check if frames are read from the Arrow file.
+
+    The arrow backend falls back to the csv files while the Arrow file is missing
+    or was written for another catalog version than the current one.
+    """
+    return DATA_BACKEND == "arrow" and is_current_arrow_file()
+
+
+class DataFrameCache:
+    """
+    Thread-safe LRU cache for parsed csv files, kept in the compact representation of compact.py.
+
+    Every entry remembers the mtime and size of the file it was parsed from,
+    so a refreshed csv_data tree is picked up without restarting the app.
+    With a shared cache, frames parsed by another worker process are unpickled from it
+    instead of parsing the csv again, each process still keeps its own copy in memory.
+    """
+
+    def __init__(self, maxsize: int = DATAFRAME_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple, path: str) -> pd.DataFrame:
+        """
+        Return the cached frame for key or parse path if it is missing or stale.
+        """
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                record_cache("dataframe", hit=True)
+                return entry[1]
+            self.misses += 1
+        record_cache("dataframe", hit=False)
+
+        # parse outside of the lock so other keys are not blocked by a slow read
+        shared_cache = get_shared_cache()
+        # the categories of Standort depend on the catalog
+        shared_key = ("dataframe", key, signature, load_catalog()["version"])
+        df = shared_cache.get(shared_key) if shared_cache is not None else None
+        if df is None:
+            import pandas as pd
+
+            df = compact_frame(pd.read_csv(path), get_standort_dtype())
+            if shared_cache is not None:
+                shared_cache.set(shared_key, df)
+
+        with self._lock:
+            self._entries[key] = (signature, df)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return df
 
-CSV_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "csv_data")
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
 
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
 
+
+_dataframe_cache = DataFrameCache()
+# beruf -> (catalog version and file signatures, frame of all semesters)
+_history_lock = threading.Lock()
+_history_cache: OrderedDict = OrderedDict()
+
+
+@instrument
 def get_all_semesters() -> list[str]:
     """
-    Get all semesters from the CSV_DATA_PATH.
+    Get all semesters from the catalog, newest first.
     """
-    all_semesters = glob.glob(os.path.join(CSV_DATA_PATH, "*"))
-    return [os.path.basename(semester) for semester in all_semesters]
+    return list(load_catalog()["semesters"])
 
 
-def get_berufe_for_semester(semester: str) -> pd.DataFrame:
+@instrument
+def get_berufe_for_semester(semester: str) -> list[str]:
     """
-    Get the berufe data for a given semester.
+    Get the beruf slugs (csv file names without .csv) for a given semester.
     """
-    all_berufe_folders = glob.glob(os.path.join(CSV_DATA_PATH, semester, "*"))
-    berufe = [os.path.basename(folder) for folder in all_berufe_folders]
+    semester_entry = load_catalog()["semesters"].get(semester)
+    return list(semester_entry["berufe"]) if semester_entry else []
 
-    return berufe
+
+@instrument
+def get_beruf_options(semester: str) -> list[dict]:
+    """
+    Get dropdown options for the berufe of a semester, labelled with their display names.
+    """
+    semester_entry = load_catalog()["semesters"].get(semester)
+    if semester_entry is None:
+        return []
+    return [
+        {"label": entry["name"], "value": slug}
+        for slug, entry in semester_entry["berufe"].items()
+    ]
 
 
-def get_dataframe(semester: str, beruf: str) -> pd.DataFrame:
+@instrument
+def get_dataframe(
+    semester: str, beruf: str, columns: list[str] | None = None
+) -> pd.DataFrame:
     """
     Get the berufsstatistik data for a given semester and beruf.
+    The beruf can be given with or without the .csv suffix.
+    With columns only these columns are returned.
+
+    The returned frame is shared between callers through the cache,
+    so it must not be modified in place.
+    """
+    beruf = beruf.removesuffix(".csv")
+    if uses_arrow_file():
+        # a slice of the mapped file, only the requested columns are materialized
+        return get_arrow_frame(semester, beruf, columns)
+    path = os.path.join(CSV_DATA_PATH, semester, f"{beruf}.csv")
+    df = _dataframe_cache.get((semester, beruf), path)
+    return df[columns] if columns is not None else df
+
+
+@instrument
+def get_all_beruf_options() -> list[dict]:
+    """
+    Get dropdown options for the berufe of all semesters, labelled with their display names.
+    """
+    options = {}
+    for semester_entry in load_catalog()["semesters"].values():
+        for slug, entry in semester_entry["berufe"].items():
+            options.setdefault(slug, entry["name"])
+    return [
+        {"label": name, "value": slug}
+        for slug, name in sorted(options.items(), key=lambda item: item[1])
+    ]
+
+
+@instrument
+def get_beruf_semesters(beruf: str) -> list[str]:
+    """
+    Get the semesters in which a beruf has data, oldest first.
+    """
+    beruf = beruf.removesuffix(".csv")
+    return [
+        semester
+        for semester, semester_entry in reversed(load_catalog()["semesters"].items())
+        if beruf in semester_entry["berufe"]
+    ]
+
+
+@instrument
+def get_beruf_standorte(beruf: str) -> list[str]:
+    """
+    Get the Standorte of a beruf in all semesters from the catalog, sorted by name.
+    """
+    beruf = beruf.removesuffix(".csv")
+    standorte = set()
+    for semester_entry in load_catalog()["semesters"].values():
+        entry = semester_entry["berufe"].get(beruf)
+        if entry is not None:
+            standorte.update(entry["standorte"])
+    return sorted(standorte)
+
+
+def get_source_signature(semester: str, beruf: str) -> tuple[int, int]:
+    """
+    Get the mtime and size of the file the frame of a semester and beruf is read from.
+    """
+    if uses_arrow_file():
+        path = ARROW_DATA_PATH
+    else:
+        path = os.path.join(CSV_DATA_PATH, semester, f"{beruf}.csv")
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@instrument
+def get_beruf_history(
+    beruf: str, progress: Callable[[int, int], None] | None = None
+) -> pd.DataFrame:
+    """
+    Get the data of a beruf for all semesters as one long frame with a semester column.
+
+    The semester column is an ordered categorical (oldest first), Standort is categorical.
+    The frame is concatenated once per catalog version and shared between callers,
+    so it must not be modified in place. Like the dataframe cache, it is concatenated
+    again when one of its files changes. progress(loaded, total) is called after
+    every semester that had to be loaded.
+    """
+    beruf = beruf.removesuffix(".csv")
+    semesters = get_beruf_semesters(beruf)
+    signature = (
+        load_catalog()["version"],
+        tuple(get_source_signature(semester, beruf) for semester in semesters),
+    )
+    with _history_lock:
+        entry = _history_cache.get(beruf)
+        if entry is not None and entry[0] == signature:
+            _history_cache.move_to_end(beruf)
+            record_cache("history", hit=True)
+            return entry[1]
+    record_cache("history", hit=False)
+
+    import pandas as pd
+
+    if not semesters:
+        return pd.DataFrame(columns=["semester", "Standort"] + COMPARISON_COLUMNS)
+    frames = []
+    for semester in semesters:
+        frames.append(get_dataframe(semester, beruf))
+        if progress is not None:
+            progress(len(frames), len(semesters))
+    history = (
+        pd.concat(
+            frames,
+            keys=semesters,
+            names=["semester", None],
+        )
+        .reset_index(level="semester")
+        .reset_index(drop=True)
+    )
+    history["semester"] = pd.Categorical(
+        history["semester"], categories=semesters, ordered=True
+    )
+    history["Standort"] = history["Standort"].astype("category")
+
+    with _history_lock:
+        _history_cache[beruf] = (signature, history)
+        _history_cache.move_to_end(beruf)
+        while len(_history_cache) > HISTORY_CACHE_SIZE:
+            _history_cache.popitem(last=False)
+    return history
+
+
+@instrument
+def compare_semesters(
+    beruf: str,
+    from_semester: str,
+    to_semester: str,
+    columns: list[str] | None = None,
+    progress: Callable[[int, int], None] | None = None,
+) -> pd.DataFrame:
+    """
+    Compare the Standorte of a beruf between two semesters.
+
+    Returns one row per Standort with the values of both semesters and their
+    difference for every column ("Bestehensquote 20232", "Bestehensquote 20242",
+    "Δ Bestehensquote", ...). Standorte missing in one of the semesters have NaN values.
+    progress is passed to get_beruf_history.
+    """
+    import pandas as pd
+
+    columns = columns or COMPARISON_COLUMNS
+    history = get_beruf_history(beruf, progress)
+    columns = [column for column in columns if column in history.columns]
+    history = history[history["semester"].isin([from_semester, to_semester])]
+
+    # (column, semester) columns with one row per Standort
+    wide = history.pivot_table(
+        index="Standort",
+        columns="semester",
+        values=columns,
+        observed=True,
+        aggfunc="first",
+    )
+    wide = wide.reindex(
+        pd.MultiIndex.from_product([columns, [from_semester, to_semester]]), axis=1
+    )
+    from_values = wide.xs(from_semester, axis=1, level=1)
+    to_values = wide.xs(to_semester, axis=1, level=1)
+    deltas = to_values - from_values
+
+    comparison = pd.concat(
+        [
+            from_values.add_suffix(f" {from_semester}"),
+            to_values.add_suffix(f" {to_semester}"),
+            deltas.add_prefix("Δ "),
+        ],
+        axis=1,
+    )
+    # Bestehensquote 20232, Bestehensquote 20242, Δ Bestehensquote, ...
+    order = [
+        name
+        for column in columns
+        for name in (
+            f"{column} {from_semester}",
+            f"{column} {to_semester}",
+            f"Δ {column}",
+        )
+    ]
+    comparison = comparison[order].round(1)
+    comparison.index = comparison.index.astype(str)
+    return comparison.rename_axis("Standort").reset_index()
+
+
+@instrument
+def get_semester_deltas(beruf: str, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Get the change of every Standort to its previous semester.
+
+    Returns the long frame of get_beruf_history with the columns replaced by
+    their difference to the previous semester of the same Standort (NaN for the first one).
+    """
+    import pandas as pd
+
+    columns = columns or COMPARISON_COLUMNS
+    history = get_beruf_history(beruf)
+    columns = [column for column in columns if column in history.columns]
+    history = history.sort_values(["Standort", "semester"])
+    deltas = history.groupby("Standort", observed=True)[columns].diff()
+    return pd.concat([history[["semester", "Standort"]], deltas], axis=1)
+
+
+@instrument
+def get_modules(semester: str, beruf: str) -> list[str]:
+    """
+    Get the exam modules of a beruf in a given semester.
+    The modules files are small and read directly, they are not stats frames.
+    """
+    import pandas as pd
+
+    beruf = beruf.removesuffix(".csv")
+    path = os.path.join(MODULES_DATA_PATH, semester, f"{beruf}.csv")
+    if not os.path.exists(path):
+        return []
+    return pd.read_csv(path)["module"].tolist()
+
+
+@instrument
+def read_parquet_dataset(
+    columns: list[str] | None = None,
+    semesters: list[str] | None = None,
+    berufe: list[str] | None = None,
+) -> pd.DataFrame:
+    """
+    Read the parquet dataset written by 2_convert_xls_to_csv.py --parquet.
+
+    Only the requested columns are read and the semester/beruf filters are pushed
+    down to the partition directories, so unrelated files are never opened.
+    Berufe can be given with or without the .csv suffix.
+    """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    filters = []
+    if semesters is not None:
+        filters.append(("semester", "in", list(semesters)))
+    if berufe is not None:
+        filters.append(
+            ("beruf", "in", [beruf.removesuffix(".csv") for beruf in berufe])
+        )
+
+    df = pd.read_parquet(
+        PARQUET_DATA_PATH,
+        engine="pyarrow",
+        columns=columns,
+        filters=filters or None,
+        # semesters look like numbers, but they are identifiers
+        partitioning=ds.partitioning(
+            pa.schema([("semester", pa.string()), ("beruf", pa.string())]),
+            flavor="hive",
+        ),
+    )
+    for column in ["semester", "beruf"]:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def get_cache_stats() -> dict:
+    """
+    Get the hit/miss/eviction counters of the dataframe cache.
+    """
+    return _dataframe_cache.stats()
+
+
+def clear_cache() -> None:
+    """
+    Drop all cached dataframes and reset the counters.
     """
-    return pd.read_csv(os.path.join(CSV_DATA_PATH, semester, beruf))
+    _dataframe_cache.clear()
+    with _history_lock:
+        _history_cache.clear()
 
 
+@instrument
 def get_berufsstatistik_data():
 
     return CSV_DATA_PATH
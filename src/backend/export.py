@@ -0,0 +1,265 @@
+""" Streaming exports of a selection of the stats as CSV, Parquet or XLSX.
+
+The frames of the selection are loaded one (semester, beruf) at a time and written
+in chunks, so exporting the whole dataset never holds more than one frame and one
+chunk of the file in memory. The frames are read without the dataframe cache, so an
+export does not evict the frames the dashboard is showing.
+
+pyarrow (Parquet) and xlsxwriter (XLSX) are imported when an export of their format starts.
+xlsxwriter is the optional extra "excel", without it XLSX exports are rejected.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterator
+
+from src.backend import data_functions
+from src.backend.aggregates import COUNT_COLUMNS
+from src.backend.arrow_store import get_arrow_frame
+from src.backend.catalog import load_catalog
+from src.backend.table_query import filter_dataframe
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# format -> (mimetype, file extension)
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "xlsx": (
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "xlsx",
+    ),
+}
+KEY_COLUMNS = ["semester", "beruf", "Standort"]
+# size of the chunks the XLSX file is streamed in
+XLSX_CHUNK_SIZE = 1024 * 1024
+# rows of an Excel worksheet including the header
+XLSX_MAX_ROWS = 1_048_576
+
+
+@dataclass(frozen=True)
+class ExportSelection:
+    """
+    The data of an export: a semester range, berufe, Standorte (all if None), columns (all if None)
+    and an optional DataTable filter_query applied to every frame.
+    """
+
+    from_semester: str
+    to_semester: str
+    berufe: tuple[str, ...]
+    standorte: tuple[str, ...] | None = None
+    columns: tuple[str, ...] | None = None
+    filter_query: str = ""
+
+    def semesters(self) -> list[str]:
+        """Semesters of the catalog from from_semester to to_semester, oldest first."""
+        low, high = sorted([self.from_semester, self.to_semester])
+        return sorted(
+            semester
+            for semester in load_catalog()["semesters"]
+            if low <= semester <= high
+        )
+
+    def frame_keys(self) -> list[tuple[str, str]]:
+        """(semester, beruf) of all frames in the selection that exist in the catalog."""
+        catalog = load_catalog()["semesters"]
+        berufe = [beruf.removesuffix(".csv") for beruf in self.berufe]
+        return [
+            (semester, beruf)
+            for semester in self.semesters()
+            for beruf in berufe
+            if beruf in catalog[semester]["berufe"]
+        ]
+
+    def output_columns(self) -> list[str]:
+        """Exported columns in the order of the csv files, the key columns first."""
+        catalog = load_catalog()["semesters"]
+        available = []
+        for semester, beruf in self.frame_keys():
+            for column in catalog[semester]["berufe"][beruf]["columns"]:
+                if column not in available and column not in KEY_COLUMNS:
+                    available.append(column)
+        if self.columns is not None:
+            unknown = set(self.columns) - set(available)
+            if unknown:
+                raise ValueError(f"Unknown columns: {sorted(unknown)}")
+            available = [column for column in available if column in self.columns]
+        return KEY_COLUMNS + available
+
+
+def read_frame(semester: str, beruf: str) -> pd.DataFrame:
+    """Read a frame without the dataframe cache of data_functions."""
+    if data_functions.uses_arrow_file():
+        return get_arrow_frame(semester, beruf)
+    import pandas as pd
+
+    return pd.read_csv(
+        os.path.join(data_functions.CSV_DATA_PATH, semester, f"{beruf}.csv")
+    )
+
+
+def iter_frames(selection: ExportSelection) -> Iterator[pd.DataFrame]:
+    """
+    Yield the rows of the selection one (semester, beruf) at a time with the output columns.
+    """
+    columns = selection.output_columns()
+    for semester, beruf in selection.frame_keys():
+        df = filter_dataframe(read_frame(semester, beruf), selection.filter_query)
+        if selection.standorte is not None:
+            df = df[df["Standort"].isin(selection.standorte)]
+        if df.empty:
+            continue
+        # columns missing in this file stay empty
+        yield df.assign(semester=semester, beruf=beruf).reindex(columns=columns)
+
+
+def iter_csv(selection: ExportSelection) -> Iterator[bytes]:
+    header = True
+    for df in iter_frames(selection):
+        yield df.to_csv(index=False, header=header).encode("utf-8")
+        header = False
+    if header:
+        # an empty selection still gets its header
+        yield (",".join(selection.output_columns()) + "\n").encode("utf-8")
+
+
+class ChunkSink:
+    """File-like object that collects written bytes until they are taken."""
+
+    def __init__(self):
+        self.chunks: list[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def iter_parquet(selection: ExportSelection) -> Iterator[bytes]:
+    """
+    Write one row group per frame and yield the bytes written so far after every row group.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema(
+        [
+            (
+                column,
+                pa.string()
+                if column in KEY_COLUMNS
+                else pa.int64()
+                if column in COUNT_COLUMNS
+                else pa.float64(),
+            )
+            for column in selection.output_columns()
+        ]
+    )
+    sink = ChunkSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for df in iter_frames(selection):
+            writer.write_table(
+                pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+            )
+            yield sink.take()
+    yield sink.take()
+
+
+def iter_xlsx(selection: ExportSelection) -> Iterator[bytes]:
+    """
+    Write the rows with xlsxwriter in constant memory mode to a temporary file and stream it.
+
+    An XLSX file is a zip archive that is only complete when it is closed, so it can not be
+    sent while it is written. In constant memory mode every row is flushed to the temporary
+    file, only the finished file is read back in chunks.
+    """
+    import xlsxwriter
+
+    columns = selection.output_columns()
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "export.xlsx")
+        workbook = xlsxwriter.Workbook(
+            path, {"constant_memory": True, "nan_inf_to_errors": True}
+        )
+        worksheet = workbook.add_worksheet("Berufsstatistik")
+        worksheet.write_row(0, 0, columns)
+        row = 1
+        for df in iter_frames(selection):
+            df = df.astype(object).where(df.notna(), None)
+            for values in df.itertuples(index=False):
+                worksheet.write_row(row, 0, values)
+                row += 1
+        workbook.close()
+
+        with open(path, "rb") as file:
+            while chunk := file.read(XLSX_CHUNK_SIZE):
+                yield chunk
+
+
+def has_xlsx_support() -> bool:
+    """Check if xlsxwriter is installed, without importing it."""
+    return importlib.util.find_spec("xlsxwriter") is not None
+
+
+def check_xlsx_rows(selection: ExportSelection) -> None:
+    """
+    Raise a ValueError if the rows of the selection do not fit on one worksheet.
+
+    The row counts of the catalog are an upper bound, the frames are only read
+    and filtered to count their rows when it is exceeded.
+    """
+    catalog = load_catalog()["semesters"]
+    rows = sum(
+        catalog[semester]["berufe"][beruf]["rows"]
+        for semester, beruf in selection.frame_keys()
+    )
+    if rows > XLSX_MAX_ROWS - 1:
+        rows = sum(len(df) for df in iter_frames(selection))
+    if rows > XLSX_MAX_ROWS - 1:
+        raise ValueError(
+            f"The selection has more than {XLSX_MAX_ROWS - 1} rows, export it as CSV or Parquet"
+        )
+
+
+def stream_export(selection: ExportSelection, export_format: str) -> Iterator[bytes]:
+    """
+    Get the chunks of the export of a selection in a format of EXPORT_FORMATS.
+    Unknown columns, XLSX exports with too many rows and XLSX exports without
+    xlsxwriter raise a ValueError before the first chunk is produced.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(
+            f"Unknown export format {export_format}, use one of {sorted(EXPORT_FORMATS)}"
+        )
+    selection.output_columns()
+    if export_format == "xlsx":
+        if not has_xlsx_support():
+            raise ValueError(
+                "XLSX exports need xlsxwriter (poetry install --extras excel), export it as CSV or Parquet"
+            )
+        check_xlsx_rows(selection)
+    writer = {"csv": iter_csv, "parquet": iter_parquet, "xlsx": iter_xlsx}[
+        export_format
+    ]
+    return writer(selection)
@@ -0,0 +1,88 @@
+""" Memory report of the stats frames before and after the compact representation.
+
+    python src/backend/memory_report.py [--semesters 20242 ...] [--all]
+
+Prints the bytes of every (semester, beruf) frame as parsed by pandas and in the
+compact representation of compact.py, and the totals of the whole dataset. The
+Standort categories are shared by all compact frames and counted once in the total.
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from src.backend.catalog import CSV_DATA_PATH, load_catalog
+from src.backend.compact import compact_frame, frame_memory, get_standort_dtype
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--semesters",
+        nargs="+",
+        default=["all"],
+        help="Semesters to report (20232 20234 ...) or all",
+    )
+    parser.add_argument(
+        "--all",
+        action="store_true",
+        help="Print every frame, not only the totals per semester",
+    )
+    return parser.parse_args()
+
+
+def memory_report(semesters: list[str]) -> pd.DataFrame:
+    """
+    One row per (semester, beruf) with its rows and bytes as parsed and compact.
+    """
+    catalog = load_catalog()["semesters"]
+    standort_dtype = get_standort_dtype()
+    rows = []
+    for semester in catalog if semesters == ["all"] else semesters:
+        for beruf in catalog.get(semester, {"berufe": {}})["berufe"]:
+            parsed = pd.read_csv(os.path.join(CSV_DATA_PATH, semester, f"{beruf}.csv"))
+            rows.append(
+                {
+                    "semester": semester,
+                    "beruf": beruf,
+                    "rows": len(parsed),
+                    "parsed bytes": frame_memory(parsed),
+                    "compact bytes": frame_memory(
+                        compact_frame(parsed, standort_dtype), shared_categories=True
+                    ),
+                }
+            )
+    return pd.DataFrame(
+        rows, columns=["semester", "beruf", "rows", "parsed bytes", "compact bytes"]
+    )
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = memory_report(args.semesters)
+    if report.empty:
+        print("No frames found")
+        sys.exit(1)
+
+    if args.all:
+        print(report.to_string(index=False))
+        print()
+    totals = report.groupby("semester", sort=False)[
+        ["rows", "parsed bytes", "compact bytes"]
+    ].sum()
+    totals.loc["Standort categories"] = [
+        0,
+        0,
+        get_standort_dtype().categories.memory_usage(deep=True),
+    ]
+    totals.loc["total"] = totals.sum()
+    totals["ratio"] = (
+        totals["compact bytes"]
+        / totals["parsed bytes"].where(totals["parsed bytes"] > 0)
+    ).round(2)
+    print(totals.to_string(na_rep=""))
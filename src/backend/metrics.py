@@ -0,0 +1,231 @@
+""" In-memory metrics of the dashboard in the Prometheus text format.
+
+Instrumented functions record their wall time and the number of rows they returned
+into histograms, the caches count their hits and misses. Everything is attributed to
+the callback that is running (see src/frontend/instrumentation.py), so the metrics
+show which callback spends its time in which backend function.
+
+The metrics live in the memory of the process. With several gunicorn workers every
+worker serves its own metrics, labelled with its pid.
+"""
+
+import contextvars
+import functools
+import os
+import sys
+import threading
+import time
+
+# upper bounds of the histogram buckets
+DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+ROW_BUCKETS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+BYTE_BUCKETS = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# name of the callback that is running in this thread, "" outside of callbacks
+current_callback: contextvars.ContextVar[str] = contextvars.ContextVar(
+    "current_callback", default=""
+)
+
+
+class Histogram:
+    """
+    Cumulative histogram per label set, like a Prometheus histogram.
+    """
+
+    def __init__(
+        self, name: str, help_text: str, label_names: tuple[str, ...], buckets: tuple
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        # labels -> [count per bucket..., count, sum]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        values = self._values.get(labels)
+        if values is None:
+            values = self._values[labels] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                values[i] += 1
+        values[-2] += 1
+        values[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, values in sorted(self._values.items()):
+            label_text = format_labels(self.label_names, labels)
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{label_text},le="+Inf"}} {values[-2]}')
+            lines.append(f"{self.name}_count{{{label_text}}} {values[-2]}")
+            lines.append(f"{self.name}_sum{{{label_text}}} {values[-1]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, value: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(
+                f"{self.name}{{{format_labels(self.label_names, labels)}}} {value}"
+            )
+        return lines
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple[str, ...], values: tuple) -> str:
+    return ",".join(
+        f'{name}="{escape_label(value)}"'
+        for name, value in zip(("pid",) + names, (os.getpid(),) + values)
+    )
+
+
+_lock = threading.Lock()
+CALLBACK_DURATION = Histogram(
+    "ihk_callback_duration_seconds",
+    "Wall time of the callback functions",
+    ("callback", "trigger", "status"),
+    DURATION_BUCKETS,
+)
+CALLBACK_ROWS = Histogram(
+    "ihk_callback_rows", "Rows returned by the callbacks", ("callback",), ROW_BUCKETS
+)
+REQUEST_DURATION = Histogram(
+    "ihk_request_duration_seconds",
+    "Wall time of the callback requests including the serialization of the response",
+    ("callback",),
+    DURATION_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    "ihk_response_bytes",
+    "Size of the serialized callback responses",
+    ("callback",),
+    BYTE_BUCKETS,
+)
+BACKEND_DURATION = Histogram(
+    "ihk_backend_duration_seconds",
+    "Wall time of the backend functions",
+    ("function", "callback"),
+    DURATION_BUCKETS,
+)
+BACKEND_ROWS = Histogram(
+    "ihk_backend_rows",
+    "Rows returned by the backend functions",
+    ("function",),
+    ROW_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "ihk_cache_requests_total",
+    "Lookups of the in-process caches",
+    ("cache", "result", "callback"),
+)
+ALL_METRICS = [
+    CALLBACK_DURATION,
+    CALLBACK_ROWS,
+    REQUEST_DURATION,
+    RESPONSE_BYTES,
+    BACKEND_DURATION,
+    BACKEND_ROWS,
+    CACHE_REQUESTS,
+]
+
+
+def observe(histogram: Histogram, labels: tuple, value: float) -> None:
+    with _lock:
+        histogram.observe(labels, value)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Count a hit or miss of a cache for the running callback.
+    """
+    with _lock:
+        CACHE_REQUESTS.inc((cache, "hit" if hit else "miss", current_callback.get()))
+
+
+def count_rows(result) -> int | None:
+    """
+    Rows of a frame or list, for tuples of the first one in them. None for other results.
+    """
+    if isinstance(result, tuple):
+        return next(
+            (rows for rows in map(count_rows, result) if rows is not None), None
+        )
+    if isinstance(result, list):
+        return len(result)
+    # without pandas imported the result cannot be a frame, so pandas is not imported here
+    pd = sys.modules.get("pandas")
+    if pd is not None and isinstance(result, (pd.DataFrame, pd.Series)):
+        return len(result)
+    return None
+
+
+def instrument(func):
+    """
+    Record the wall time and the returned rows of a backend function.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            observe(
+                BACKEND_DURATION,
+                (func.__name__, current_callback.get()),
+                time.perf_counter() - start,
+            )
+        rows = count_rows(result)
+        if rows is not None:
+            observe(BACKEND_ROWS, (func.__name__,), rows)
+        return result
+
+    return wrapper
+
+
+def render_metrics() -> str:
+    """
+    All metrics of this process in the Prometheus text format.
+    """
+    with _lock:
+        lines = [line for metric in ALL_METRICS for line in metric.render()]
+    return "\n".join(lines) + "\n"
+
+
+def reset_metrics() -> None:
+    with _lock:
+        for metric in ALL_METRICS:
+            metric._values.clear()
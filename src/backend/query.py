@@ -0,0 +1,247 @@
+""" Query API over all semesters and berufe on an embedded DuckDB database.
+
+The converter writes all csv files into one table (``2_convert_xls_to_csv.py --duckdb``),
+so questions over the whole dataset are answered by DuckDB instead of loading and
+concatenating csv files with pandas:
+
+    # all Standorte with a Bestehensquote below 80 % in any IT beruf since 2022
+    query(
+        columns=["semester", "beruf", "Standort", "Bestehensquote"],
+        filters=[
+            Filter("beruf", "contains", "Fachinformatiker"),
+            Filter("semester", ">=", "20222"),
+            Filter("Bestehensquote", "<", 80),
+        ],
+        order_by=["Bestehensquote"],
+    )
+
+    # participants per semester, the 5 largest first
+    query(
+        group_by=["semester"],
+        aggregates=[Aggregate("sum", "Anzahl Teilnehmer")],
+        order_by=["sum Anzahl Teilnehmer"],
+        descending=True,
+        limit=5,
+    )
+
+duckdb is an optional dependency, it is only imported when the database is used.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+
+from src.backend.catalog import DATA_PATH
+
+DUCKDB_PATH = os.path.join(DATA_PATH, "stats.duckdb")
+TABLE_NAME = "stats"
+
+OPERATORS = {"=", "!=", "<", "<=", ">", ">=", "in", "contains"}
+AGGREGATE_FUNCTIONS = {"sum", "avg", "min", "max", "count"}
+
+_connection_lock = threading.Lock()
+_connection_state = {"signature": None, "connection": None, "columns": None}
+
+
+@dataclass(frozen=True)
+class Filter:
+    """A condition on one column, e.g. Filter("Bestehensquote", "<", 80) or Filter("semester", "in", ["20232", "20234"])."""
+
+    column: str
+    operator: str
+    value: Any
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    """An aggregation of one column for query(group_by=...), named "<function> <column>" unless a name is given."""
+
+    function: str
+    column: str
+    name: str | None = None
+
+    @property
+    def output_name(self) -> str:
+        return self.name or f"{self.function} {self.column}"
+
+
+def write_database(df: pd.DataFrame, path: str = DUCKDB_PATH) -> None:
+    """
+    Write the long frame of all csv files (columns semester, beruf, Standort, ...) into the database.
+
+    The database is written to a temporary file first and then replaces the old one,
+    so a running dashboard never reads half a file.
+    """
+    import duckdb
+
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    connection = duckdb.connect(tmp_path)
+    try:
+        connection.register("frame", df)
+        connection.execute(
+            f'CREATE TABLE {TABLE_NAME} AS SELECT * FROM frame ORDER BY semester, beruf, "Standort"'
+        )
+    finally:
+        connection.close()
+    os.replace(tmp_path, path)
+
+
+def get_connection():
+    """
+    Get a read-only connection to the database, opened once per process.
+
+    The database is opened again when its mtime or size changes, so a new
+    conversion run is picked up without a restart.
+    """
+    import duckdb
+
+    stat = os.stat(DUCKDB_PATH)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _connection_lock:
+        if _connection_state["signature"] != signature:
+            if _connection_state["connection"] is not None:
+                _connection_state["connection"].close()
+            connection = duckdb.connect(DUCKDB_PATH, read_only=True)
+            _connection_state["connection"] = connection
+            _connection_state["columns"] = [
+                row[0]
+                for row in connection.execute(f"DESCRIBE {TABLE_NAME}").fetchall()
+            ]
+            _connection_state["signature"] = signature
+        return _connection_state["connection"], _connection_state["columns"]
+
+
+def identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def quote(column: str, known_columns: list[str]) -> str:
+    """Quote a column name for SQL, only columns of the table are accepted."""
+    if column not in known_columns:
+        raise ValueError(
+            f"Unknown column {column!r}, available columns: {known_columns}"
+        )
+    return identifier(column)
+
+
+def build_sql(
+    known_columns: list[str],
+    columns: list[str] | None = None,
+    filters: list[Filter] | None = None,
+    group_by: list[str] | None = None,
+    aggregates: list[Aggregate] | None = None,
+    order_by: list[str] | None = None,
+    descending: bool = False,
+    limit: int | None = None,
+) -> tuple[str, list]:
+    """
+    Build the SQL statement and its parameters for query.
+
+    Column names are checked against the table and values are always passed as
+    parameters, so no input ends up in the statement as is.
+    """
+    parameters = []
+
+    if group_by or aggregates:
+        group_by = group_by or []
+        select = [quote(column, known_columns) for column in group_by]
+        for aggregate in aggregates or []:
+            if aggregate.function not in AGGREGATE_FUNCTIONS:
+                raise ValueError(
+                    f"Unknown aggregate function {aggregate.function!r}, use one of {sorted(AGGREGATE_FUNCTIONS)}"
+                )
+            select.append(
+                f"{aggregate.function}({quote(aggregate.column, known_columns)}) AS {identifier(aggregate.output_name)}"
+            )
+        output_columns = group_by + [
+            aggregate.output_name for aggregate in aggregates or []
+        ]
+    else:
+        columns = columns or known_columns
+        select = [quote(column, known_columns) for column in columns]
+        output_columns = columns
+    sql = f"SELECT {', '.join(select)} FROM {TABLE_NAME}"
+
+    conditions = []
+    for condition in filters or []:
+        column = quote(condition.column, known_columns)
+        if condition.operator not in OPERATORS:
+            raise ValueError(
+                f"Unknown operator {condition.operator!r}, use one of {sorted(OPERATORS)}"
+            )
+        if condition.operator == "in":
+            values = list(condition.value)
+            if not values:
+                conditions.append("FALSE")
+                continue
+            conditions.append(f"{column} IN ({', '.join('?' for _ in values)})")
+            parameters.extend(values)
+        elif condition.operator == "contains":
+            conditions.append(f"contains(lower(CAST({column} AS VARCHAR)), lower(?))")
+            parameters.append(str(condition.value))
+        else:
+            conditions.append(f"{column} {condition.operator} ?")
+            parameters.append(condition.value)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+
+    if group_by:
+        sql += " GROUP BY " + ", ".join(
+            quote(column, known_columns) for column in group_by
+        )
+
+    if order_by:
+        direction = "DESC" if descending else "ASC"
+        sql += " ORDER BY " + ", ".join(
+            f"{quote(column, output_columns)} {direction}" for column in order_by
+        )
+
+    if limit is not None:
+        sql += " LIMIT ?"
+        parameters.append(int(limit))
+    return sql, parameters
+
+
+def query(
+    columns: list[str] | None = None,
+    filters: list[Filter] | None = None,
+    group_by: list[str] | None = None,
+    aggregates: list[Aggregate] | None = None,
+    order_by: list[str] | None = None,
+    descending: bool = False,
+    limit: int | None = None,
+) -> pd.DataFrame:
+    """
+    Query the statistics of all semesters and berufe.
+
+    Args:
+        columns: The columns to return, all columns if None. Ignored for grouped queries.
+        filters: Conditions that all have to match.
+        group_by: Group the rows by these columns and return one row per group.
+        aggregates: The aggregations of a grouped query (also without group_by for one total row).
+        order_by: Sort by these columns, for grouped queries also by aggregate names.
+        descending: Sort descending, e.g. for top-N queries together with limit.
+        limit: Return at most this many rows.
+    """
+    connection, known_columns = get_connection()
+    sql, parameters = build_sql(
+        known_columns,
+        columns,
+        filters,
+        group_by,
+        aggregates,
+        order_by,
+        descending,
+        limit,
+    )
+    # a cursor is a separate connection to the same database, so callbacks can query from several threads
+    cursor = connection.cursor()
+    try:
+        return cursor.execute(sql, parameters).df()
+    finally:
+        cursor.close()
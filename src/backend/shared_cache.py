@@ -0,0 +1,48 @@
+""" Parse cache on the local disk that is shared by all worker processes of the dashboard.
+
+With several gunicorn workers every process would otherwise parse the same csv
+files and build the same figures again. When the environment variable
+IHK_SHARED_CACHE_PATH is set, parsed frames and figure specs are pickled into a
+diskcache.Cache in that folder, so a file is only parsed once for all workers.
+The memory is not shared: every worker unpickles its own copy of an entry into a
+small in-process cache in front of the disk cache.
+
+diskcache is an optional dependency, it is only imported when the shared cache is enabled.
+"""
+
+import os
+import threading
+
+# maximum size of the shared cache on disk
+SHARED_CACHE_SIZE_LIMIT = int(
+    os.environ.get("IHK_SHARED_CACHE_SIZE_LIMIT", 1024 * 1024 * 1024)
+)
+
+_shared_cache_lock = threading.Lock()
+_shared_cache_state = {"path": None, "cache": None}
+
+
+def get_shared_cache_path() -> str | None:
+    return os.environ.get("IHK_SHARED_CACHE_PATH") or None
+
+
+def get_shared_cache():
+    """
+    Get the diskcache.Cache shared by all processes or None if it is not enabled.
+    The cache is opened once per process, diskcache handles the locking between processes.
+    """
+    path = get_shared_cache_path()
+    if path is None:
+        return None
+
+    with _shared_cache_lock:
+        if _shared_cache_state["path"] != path:
+            import diskcache
+
+            _shared_cache_state["cache"] = diskcache.Cache(
+                path,
+                size_limit=SHARED_CACHE_SIZE_LIMIT,
+                eviction_policy="least-recently-used",
+            )
+            _shared_cache_state["path"] = path
+        return _shared_cache_state["cache"]
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import math
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# operators of the DataTable filter syntax, two-character symbols first so "<=" is not read as "<"
+FILTER_OPERATORS = {
+    ">=": ">=",
+    "<=": "<=",
+    "!=": "!=",
+    "<": "<",
+    ">": ">",
+    "=": "=",
+    "ge": ">=",
+    "le": "<=",
+    "ne": "!=",
+    "lt": "<",
+    "gt": ">",
+    "eq": "=",
+    "contains": "contains",
+    "datestartswith": "datestartswith",
+}
+
+
+def split_filter_part(
+    filter_part: str,
+) -> tuple[str | None, str | None, str | float | None]:
+    """
+    Split one part of a DataTable filter_query ({Bestehensquote} > 80) into column, operator and value.
+    """
+    filter_part = filter_part.strip()
+    if not filter_part.startswith("{") or "}" not in filter_part:
+        return None, None, None
+    name, rest = filter_part[1:].split("}", 1)
+    rest = rest.strip()
+
+    for operator, canonical in FILTER_OPERATORS.items():
+        is_word = operator[0].isalpha()
+        if rest.startswith(operator + " " if is_word else operator):
+            value_part = rest[len(operator) :].strip()
+            if (
+                value_part
+                and value_part[0] == value_part[-1]
+                and value_part[0] in ("'", '"', "`")
+            ):
+                value = value_part[1:-1].replace("\\" + value_part[0], value_part[0])
+            else:
+                try:
+                    value = float(value_part)
+                except ValueError:
+                    value = value_part
+            return name, canonical, value
+    return None, None, None
+
+
+def filter_dataframe(df: pd.DataFrame, filter_query: str | None) -> pd.DataFrame:
+    """
+    Apply a DataTable filter_query ({Standort} contains Berlin && {Bestehensquote} < 80) to df.
+    """
+    if not filter_query:
+        return df
+
+    import pandas as pd
+
+    mask = pd.Series(True, index=df.index)
+    for filter_part in filter_query.split(" && "):
+        column, operator, value = split_filter_part(filter_part)
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Standort is an unordered categorical, < and > compare its names like strings
+            values = values.astype(str)
+        if (
+            operator in (">=", "<=", "<", ">")
+            and isinstance(value, str)
+            and pd.api.types.is_numeric_dtype(values)
+        ):
+            # a text can not be compared with numbers, nothing matches
+            mask &= False
+        elif operator == ">=":
+            mask &= values >= value
+        elif operator == "<=":
+            mask &= values <= value
+        elif operator == "<":
+            mask &= values < value
+        elif operator == ">":
+            mask &= values > value
+        elif operator == "!=":
+            mask &= values != value
+        elif operator == "=":
+            mask &= values == value
+        elif operator == "contains":
+            mask &= values.astype(str).str.contains(str(value), case=False, regex=False)
+        elif operator == "datestartswith":
+            mask &= values.astype(str).str.startswith(str(value))
+    return df[mask]
+
+
+def sort_dataframe(
+    df: pd.DataFrame, sort_by: list[dict] | None, default_column: str | None = None
+) -> pd.DataFrame:
+    """
+    Sort df by the DataTable sort_by or, without one, descending by default_column.
+    """
+    if sort_by:
+        sort_by = [sort for sort in sort_by if sort["column_id"] in df.columns]
+    if sort_by:
+        return df.sort_values(
+            by=[sort["column_id"] for sort in sort_by],
+            ascending=[sort["direction"] == "asc" for sort in sort_by],
+        )
+    if default_column in df.columns:
+        return df.sort_values(by=default_column, ascending=False)
+    return df
+
+
+def get_page(
+    df: pd.DataFrame, page_current: int | None, page_size: int | None
+) -> tuple[pd.DataFrame, int]:
+    """
+    Get the rows of one table page and the number of pages.
+    """
+    page_current = page_current or 0
+    if not page_size:
+        return df, 1
+    page_count = max(1, math.ceil(len(df) / page_size))
+    start = page_current * page_size
+    return df.iloc[start : start + page_size], page_count
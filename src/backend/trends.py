@@ -0,0 +1,210 @@
+""" Precomputed time series of every (Beruf, Standort) over all semesters.
+
+The converter keeps data/trends.csv up to date: one row per (beruf, Standort, semester)
+with the values of TREND_COLUMNS and for every column
+
+    "<column> Mittel"   rolling mean over the last ROLLING_WINDOW semesters of the Standort
+    "Δ <column>"        difference to the previous semester of the Standort
+    "z <column>"        z-score against the Standorte of the beruf in the semester
+
+When semesters are converted again, only the series of their berufe are recomputed from
+the values already stored in the file, no other csv file is read. The dashboard loads the
+file once and a series is a slice of consecutive rows, found by its position in an index.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from src.backend.aggregates import NATIONAL_SCOPE
+from src.backend.catalog import DATA_PATH
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TRENDS_PATH = os.path.join(DATA_PATH, "trends.csv")
+TREND_COLUMNS = ["Anzahl Teilnehmer", "Bestehensquote", "ø Gesamtpunktzahl"]
+KEY_COLUMNS = ["beruf", "Standort", "semester"]
+ROLLING_WINDOW = 3
+
+_trends_lock = threading.Lock()
+_trends_state = {"signature": None, "trends": None, "index": None, "standorte": None}
+
+
+def derived_columns(column: str) -> list[str]:
+    return [f"{column} Mittel", f"Δ {column}", f"z {column}"]
+
+
+def build_trends(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Build the series of the long frame of all csv files (columns semester, beruf, Standort, ...)
+    with their rolling means, deltas and z-scores.
+
+    df must contain all semesters of every beruf in it. Semesters sort chronologically
+    as strings (20224 < 20232 < 20234 < 20242). The z-scores use the mean and standard
+    deviation of all Standorte of the beruf in the semester. The bundesweit series has
+    no z-scores, its counts are the sums of the Standorte.
+
+    Rows without participants have 0-filled quotas. They get no derived values and are
+    skipped by the rolling means, deltas and distributions of the other rows.
+    """
+    import pandas as pd
+
+    trends = df[KEY_COLUMNS + TREND_COLUMNS].copy()
+    for column in ["beruf", "Standort", "semester"]:
+        trends[column] = trends[column].astype(str)
+    # some legacy csv files list a Standort twice
+    trends = trends.drop_duplicates(KEY_COLUMNS).sort_values(
+        KEY_COLUMNS, ignore_index=True
+    )
+
+    valid = trends["Anzahl Teilnehmer"] > 0
+    series = trends[valid].groupby(["beruf", "Standort"], sort=False)
+    standorte = trends[valid & (trends["Standort"] != NATIONAL_SCOPE)]
+    distribution = standorte.groupby(["semester", "beruf"])[TREND_COLUMNS].agg(
+        ["mean", "std"]
+    )
+    # mean and std of the semester and beruf of every row
+    row_distribution = distribution.reindex(
+        pd.MultiIndex.from_frame(trends[["semester", "beruf"]])
+    )
+
+    for column in TREND_COLUMNS:
+        mean_column, delta_column, z_column = derived_columns(column)
+        trends[mean_column] = (
+            series[column]
+            .rolling(ROLLING_WINDOW, min_periods=1)
+            .mean()
+            .reset_index(level=[0, 1], drop=True)
+        )
+        trends[delta_column] = series[column].diff()
+        std = row_distribution[(column, "std")].to_numpy()
+        mean = row_distribution[(column, "mean")].to_numpy()
+        trends[z_column] = (trends[column] - mean) / std
+        # no z-score with one Standort or equal values, there is no spread to compare with
+        trends.loc[
+            ~(std > 0) | ~valid | (trends["Standort"] == NATIONAL_SCOPE), z_column
+        ] = float("nan")
+
+    derived = [name for column in TREND_COLUMNS for name in derived_columns(column)]
+    trends[derived] = trends[derived].round(2)
+    return trends
+
+
+def update_trends(trends: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Replace the (semester, beruf) in the long frame df and recompute the series of their berufe.
+
+    The other semesters of these berufe are taken from the stored values, so only the
+    new csv files have to be loaded. Series of other berufe are kept as they are.
+    """
+    import pandas as pd
+
+    df = df.assign(semester=df["semester"].astype(str), beruf=df["beruf"].astype(str))
+    berufe = set(df["beruf"])
+    changed = pd.MultiIndex.from_frame(df[["semester", "beruf"]].drop_duplicates())
+    stored = trends.set_index(["semester", "beruf"]).index.isin(changed)
+
+    affected = trends["beruf"].isin(berufe)
+    values = pd.concat(
+        [
+            trends.loc[affected & ~stored, KEY_COLUMNS + TREND_COLUMNS],
+            df[KEY_COLUMNS + TREND_COLUMNS],
+        ]
+    )
+    updated = pd.concat([trends[~affected], build_trends(values)], ignore_index=True)
+    return updated.sort_values(KEY_COLUMNS, ignore_index=True)
+
+
+def write_trends(trends: pd.DataFrame, path: str = TRENDS_PATH) -> None:
+    """
+    Write the trends atomically, so a running dashboard never reads half a file.
+    """
+    tmp_path = f"{path}.tmp"
+    trends.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def read_trends(path: str = TRENDS_PATH) -> pd.DataFrame | None:
+    """Read the trends file as written, None if it does not exist."""
+    import pandas as pd
+
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, dtype={"semester": str, "beruf": str, "Standort": str})
+
+
+def load_trends():
+    """
+    Get the trends, the row range of every (beruf, Standort) and the Standorte of every beruf,
+    loaded once and kept in memory.
+
+    The file is only read again when its mtime or size changes. The rows are sorted
+    by beruf, Standort and semester, so every series is one range of rows.
+    """
+    import pandas as pd
+
+    try:
+        stat = os.stat(TRENDS_PATH)
+        signature = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        signature = "missing"
+
+    with _trends_lock:
+        if _trends_state["signature"] != signature:
+            trends = read_trends()
+            if trends is None:
+                columns = (
+                    KEY_COLUMNS
+                    + TREND_COLUMNS
+                    + [
+                        name
+                        for column in TREND_COLUMNS
+                        for name in derived_columns(column)
+                    ]
+                )
+                trends = pd.DataFrame(columns=columns)
+            trends = trends.sort_values(KEY_COLUMNS, ignore_index=True)
+            index = {}
+            standorte = {}
+            for (beruf, standort), rows in trends.groupby(
+                ["beruf", "Standort"], sort=False
+            ).indices.items():
+                index[(beruf, standort)] = (int(rows[0]), int(rows[-1]) + 1)
+                standorte.setdefault(beruf, []).append(standort)
+            _trends_state["trends"] = trends
+            _trends_state["index"] = index
+            _trends_state["standorte"] = standorte
+            _trends_state["signature"] = signature
+        return (
+            _trends_state["trends"],
+            _trends_state["index"],
+            _trends_state["standorte"],
+        )
+
+
+def get_trend(beruf: str, standort: str) -> pd.DataFrame:
+    """
+    Get the series of a Standort in a beruf, oldest semester first. Empty if there is none.
+    The beruf can be given with or without .csv. The frame must not be modified in place.
+    """
+    trends, index, _ = load_trends()
+    start, stop = index.get((beruf.removesuffix(".csv"), standort), (0, 0))
+    return trends.iloc[start:stop]
+
+
+def get_trends(beruf: str, standorte: list[str]) -> pd.DataFrame:
+    """Get the series of several Standorte of a beruf as one frame."""
+    import pandas as pd
+
+    trends, _, _ = load_trends()
+    frames = [get_trend(beruf, standort) for standort in standorte]
+    return pd.concat(frames, ignore_index=True) if frames else trends.iloc[0:0]
+
+
+def get_trend_standorte(beruf: str) -> list[str]:
+    """Get the Standorte with a series in a beruf, sorted by name."""
+    _, _, standorte = load_trends()
+    return list(standorte.get(beruf.removesuffix(".csv"), []))
@@ -1,9 +1,13 @@
 import argparse
+import asyncio
 import os
-import glob
 import tqdm
+from urllib.parse import urljoin
 
-from berufe import berufe_list
+from async_scraper import run_async
+from berufe import berufe_list, beruf_folder_name
+from http_scraper import run_http
+from journal import JobJournal
 from playwright.sync_api import (
     Playwright,
     sync_playwright,
@@ -11,6 +15,10 @@ from playwright.sync_api import (
 )
 
 
+DATA_PATH = os.path.join(os.path.dirname(__file__), "../data/xls_data")
+IHK_WEBSITE = "https://pes.ihk.de/"
+
+
 def parse_args():
     parser = argparse.ArgumentParser()
     parser.add_argument(
@@ -25,28 +33,77 @@ def parse_args():
         required=True,
         help="Choose 'all' for all berufe or 'custom' to specify a custom list. The custom list can be edited in berufe.py",
     )
+    parser.add_argument(
+        "--mode",
+        choices=["sync", "async", "http"],
+        default="sync",
+        help="'sync' drives one browser page sequentially, 'async' runs a pool of browser contexts concurrently, "
+        "'http' only uses the browser to set up the session and downloads over plain HTTP",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Number of browser contexts in async mode or download threads in http mode",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=2.0,
+        help="Maximum requests per second in async and http mode",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries per job (async mode) or request (http mode)",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=100,
+        help="Maximum number of queued jobs in async mode",
+    )
+    parser.add_argument(
+        "--base-url",
+        default=IHK_WEBSITE,
+        help="Website to scrape, e.g. http://localhost:8000/ for the recorded pages of stub_server.py",
+    )
+    parser.add_argument(
+        "--journal",
+        default=os.path.join(DATA_PATH, "journal.sqlite"),
+        help="SQLite file that records the state of every download, an interrupted crawl resumes from it",
+    )
+    parser.add_argument(
+        "--only",
+        choices=["all", "new", "failed"],
+        default="all",
+        help="Run all unfinished jobs, only jobs that never ran or only jobs that failed before",
+    )
+    parser.add_argument(
+        "--plan-only",
+        action="store_true",
+        help="Only record the jobs in the journal without downloading anything",
+    )
+    parser.add_argument(
+        "--record-har",
+        help="Record the pages of each browser context to <RECORD_HAR>.<i>.har in async mode (for stub_server.py)",
+    )
     return parser.parse_args()
 
 
-DATA_PATH = os.path.join(os.path.dirname(__file__), "../data/xls_data")
-IHK_WEBSITE = "https://pes.ihk.de/"
-
-
-def download_xls(page: Page, berufe_folder: str, name: str) -> None:
+def download_xls(page: Page, berufe_folder: str, name: str) -> bool:
     """Download an Excel file from the page if available.
 
     Args:
         page: The Playwright page object.
         berufe_folder: The folder path to save the Excel file.
         name: The name to use for the saved Excel file.
+
+    Returns:
+        True if the file was downloaded, False if the page has no Excel export.
     """
-    # check if file already exists, if it does, return
     excel_file_path = os.path.join(berufe_folder, f"{name}.xls")
-    if os.path.exists(excel_file_path):
-        print(f"Excel file already exists: {excel_file_path}")
-        return
-
-    
 
     # locate the download button (href contains "Excel")
     print("Before locator")
@@ -68,14 +125,15 @@ def download_xls(page: Page, berufe_folder: str, name: str) -> None:
         # save the file to the correct path
         download.save_as(excel_file_path)
         print(f"Excel file saved to: {excel_file_path}")
-    else:
-        print(f"No Excel download found for {name}")
+        return True
+    print(f"No Excel download found for {name}")
+    return False
 
 
-def run(playwright: Playwright, args: argparse.Namespace) -> None:
+def run(playwright: Playwright, args: argparse.Namespace, journal: JobJournal) -> None:
     browser = playwright.chromium.launch(headless=True)
     page = browser.new_page()
-    page.goto(IHK_WEBSITE)
+    page.goto(args.base_url)
 
     termine_locator = page.locator("select[name='termin']")
     # Get all the option values, 20234, 20232 -> 20094, 20092
@@ -140,11 +198,7 @@ def run(playwright: Playwright, args: argparse.Namespace) -> None:
         ]
 
         if args.berufe == "all":
-            selected_berufe = (
-                berufe_options_names
-                if input("Download all Berufe? (y/n)") == "y"
-                else exit("Aborted. Start Again.")
-            )
+            selected_berufe = berufe_options_names
         else:
             selected_berufe = berufe_list
 
@@ -159,13 +213,10 @@ def run(playwright: Playwright, args: argparse.Namespace) -> None:
 
         for beruf_name, beruf_id in tqdm.tqdm(name_id_berufe_list, desc="Berufe"):
             page.wait_for_load_state("networkidle")
-            beruf_page = f"https://pes.ihk.de/Auswertung.cfm?Beruf={beruf_id}"
+            beruf_page = urljoin(args.base_url, f"Auswertung.cfm?Beruf={beruf_id}")
 
             # Create the folder for the Beruf
-            berufe_folder = os.path.join(
-                termin_folder,
-                beruf_name.replace("/", "").replace(" ", "-").replace("--", "-"),
-            )
+            berufe_folder = os.path.join(termin_folder, beruf_folder_name(beruf_name))
             if not os.path.exists(berufe_folder):
                 print(f"Creating Berufe Folder {berufe_folder}")
                 os.makedirs(berufe_folder)
@@ -206,23 +257,36 @@ def run(playwright: Playwright, args: argparse.Namespace) -> None:
             ]
 
             # download excel for bundesweit before downloading for each standort
-            download_xls(page, berufe_folder, "bundesweit")
-
-            for standort_name in ihk_standort_names:
-                existing_standorte_paths = glob.glob(berufe_folder + "/*")
-                # get the Standort name from the file path (Berlin, Arnsberg, etc.)
-                existing_standorte = [
-                    standort_path.split("/")[-1].replace(".xls", "")
-                    for standort_path in existing_standorte_paths
-                ]
-
-                if standort_name in existing_standorte:
-                    print(f"Standort {standort_name} already in {berufe_folder}")
+            for standort_name in ["bundesweit"] + ihk_standort_names:
+                excel_file_path = os.path.join(berufe_folder, f"{standort_name}.xls")
+                # should_run records the planned download in the journal, also with --plan-only
+                if not journal.should_run(
+                    option_semester,
+                    beruf_name,
+                    standort_name,
+                    excel_file_path,
+                    args.only,
+                    beruf_id,
+                ):
+                    continue
+                if args.plan_only:
                     continue
 
-                standorte_locator.select_option(standort_name)
-                page.wait_for_load_state("networkidle")
-                download_xls(page, berufe_folder, standort_name)
+                journal.start(option_semester, beruf_name, standort_name)
+                try:
+                    if standort_name != "bundesweit":
+                        standorte_locator.select_option(standort_name)
+                        page.wait_for_load_state("networkidle")
+                    downloaded = download_xls(page, berufe_folder, standort_name)
+                    journal.done(
+                        option_semester,
+                        beruf_name,
+                        standort_name,
+                        excel_file_path if downloaded else None,
+                    )
+                except Exception as e:
+                    print(f"Failed to download {standort_name}: {e}")
+                    journal.failed(option_semester, beruf_name, standort_name, e)
 
             # Navigate back to the starting URL for the current Beruf
             try:
@@ -246,6 +310,15 @@ def run(playwright: Playwright, args: argparse.Namespace) -> None:
     browser.close()
 
 
-with sync_playwright() as playwright:
+if __name__ == "__main__":
     args = parse_args()
-    run(playwright, args)
+    journal = JobJournal(args.journal)
+    if args.mode == "async":
+        asyncio.run(run_async(args, DATA_PATH, journal))
+    elif args.mode == "http":
+        run_http(args, DATA_PATH, journal)
+    else:
+        with sync_playwright() as playwright:
+            run(playwright, args, journal)
+    print(f"Jobs per state: {journal.summary()}")
+    journal.close()
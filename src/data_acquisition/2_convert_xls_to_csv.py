@@ -1,12 +1,125 @@
+import argparse
+import ast
 import pandas as pd
 import glob
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
+from berufe import berufe_list, beruf_folder_name
+from xls_parser import parse_xls
 
-def parse_dataframe(path: str) -> pd.DataFrame:
-    df = pd.read_html(path)
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from src.backend.arrow_store import write_arrow_file, ARROW_DATA_PATH
+from src.backend.aggregates import build_aggregates, write_aggregates, AGGREGATES_PATH
+from src.backend.catalog import build_catalog, write_catalog, CATALOG_PATH
+from src.backend.query import write_database, DUCKDB_PATH
+from src.backend.trends import (
+    build_trends,
+    read_trends,
+    update_trends,
+    write_trends,
+    TRENDS_PATH,
+)
+
+CSV_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "data", "csv_data")
+PARQUET_DATA_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data", "parquet_data"
+)
+MODULES_DATA_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data", "modules_data"
+)
+
+GRADES = range(1, 7)
+# number of participants, stored as integers
+COUNT_COLUMNS = ["Anzahl Teilnehmer", "davon bestanden"] + [
+    f"Note {grade}" for grade in GRADES
+]
+# percentages, stored as floats (94.5 means 94.5 %)
+PERCENT_COLUMNS = ["Bestehensquote"] + [f"Note {grade} in Prozent" for grade in GRADES]
+POINTS_COLUMN = "ø Gesamtpunktzahl"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write all csv files into one parquet dataset partitioned by semester and beruf",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Number of worker processes that convert berufe in parallel",
+    )
+    parser.add_argument(
+        "--parser",
+        choices=["iterparse", "pandas"],
+        default="iterparse",
+        help="Parse the xls files with the streaming parser from xls_parser.py or with pd.read_html",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Convert all berufe, even if their csv file is newer than all of their xls files",
+    )
+    parser.add_argument(
+        "--normalize-csv",
+        action="store_true",
+        help="Convert csv files written by older versions (lost decimal commas, modules column) in place",
+    )
+    parser.add_argument(
+        "--arrow",
+        action="store_true",
+        help="Also write all csv files into one Arrow IPC file that the dashboard can memory-map",
+    )
+    parser.add_argument(
+        "--duckdb",
+        action="store_true",
+        help="Also write all csv files into one DuckDB table for the query API in src/backend/query.py",
+    )
+    parser.add_argument(
+        "--from-csv",
+        action="store_true",
+        help="Skip the xls conversion and only build the derived datasets from the existing csv files",
+    )
+    return parser.parse_args()
+
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Give all statistic columns their final dtype: integer counts and float percentages/points.
+
+    Missing values are filled with 0 so they can be plotted.
+    """
+    for column in COUNT_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].fillna(0).astype(int)
+    for column in PERCENT_COLUMNS + [POINTS_COLUMN]:
+        if column in df.columns:
+            df[column] = df[column].fillna(0).astype(float)
+    return df
+
+
+def write_modules(
+    modules: list[str], semester: str, beruf_name: str, modules_path: str | None = None
+) -> None:
+    """Store the exam modules of a beruf once per semester instead of on every Standort row."""
+    output_folder = os.path.join(modules_path or MODULES_DATA_PATH, semester)
+    os.makedirs(output_folder, exist_ok=True)
+    pd.DataFrame({"module": modules}).to_csv(
+        os.path.join(output_folder, f"{beruf_name}.csv"), index=False
+    )
+
+
+def parse_dataframe(path: str) -> tuple[pd.DataFrame, list[str]]:
+    """Parse one exported Standort file into numeric statistic columns and the list of exam modules."""
+    # the export uses German number formatting, e.g. 94,5 for a Bestehensquote of 94.5 %
+    df = pd.read_html(path, decimal=",", thousands=".")
     # Concatenate all dataframes in the list along the columns axis, using inner join to handle missing data
-    parsed_df = pd.concat(df, axis=1, join='inner')
+    parsed_df = pd.concat(df, axis=1, join="inner")
     # Set the column names to the values in the second row
     parsed_df.columns = parsed_df.iloc[1]
     # Drop the first two rows and remove the last column in one call
@@ -21,70 +134,309 @@ def parse_dataframe(path: str) -> pd.DataFrame:
     parsed_df.set_index("Index", inplace=True)
     # Transpose the dataframe to change the orientation of the data
     parsed_df = parsed_df.T
-    # Rename a column to correct a typo in the name
-    parsed_df.rename(columns={"ï¿½ Gesamtpunktzahl": "Gesamtpunktzahl"}, inplace=True)
+    # Some exports are decoded with a broken "ø", give the column its real name
+    parsed_df.rename(columns={"ï¿½ Gesamtpunktzahl": POINTS_COLUMN}, inplace=True)
     # Find the index of a specific column to use as a reference
     last_index = parsed_df.columns.get_loc("Note 6 in Prozent")
     # Extract column names after the reference column to use as modules
-    modules = parsed_df.columns.tolist()[last_index + 1:]
+    modules = parsed_df.columns.tolist()[last_index + 1 :]
     # Select only columns up to and including the reference column
-    parsed_df = parsed_df.iloc[:, :last_index+1]
-    # Add a new column 'modules' with the same list of modules for each row
-    parsed_df["modules"] = [modules] * len(parsed_df)
+    parsed_df = parsed_df.iloc[:, : last_index + 1]
+    # read_html already applied the German number format, convert the cells to real numbers once
+    parsed_df = parsed_df.apply(pd.to_numeric, errors="coerce")
     # Concatenate the new dataframe to the full dataframe, using 'Standort' as the index
     parsed_df["Standort"] = parsed_df.index
-    return parsed_df
-
-
-def run(path_to_all_semesters: str):
-    # get all xls files in the xls_data folder
-    # e.g. ../data/xls_data/20234/
-    all_semesters = glob.glob(path_to_all_semesters + "*")
-
-    # iterate over all semesters
-    for semester in all_semesters:
-        # get all berufe in the semester
-        all_berufe = glob.glob(semester + "/*")
-        
-        for path_to_beruf in all_berufe:
-            # dataframes for all standorte in the beruf
-            full_df = pd.DataFrame()
-            # get all xls files 
-            all_standorte_xls = glob.glob(path_to_beruf + "/*.xls")
-            
-            # parse each standort xls file and concatenate to full dataframe
-            for path in all_standorte_xls:
-                parsed_df = parse_dataframe(path)
-                full_df = pd.concat([full_df, parsed_df], ignore_index=True)
-
-            # drop duplicates (bundesweit)
-            full_df = full_df.drop_duplicates(subset=full_df.columns.difference(['modules']))
-
-            # clean standort column so the names are uniform -> e.g. IHK zu/für Buxtehude will just be Buxtehude 
-            full_df["Standort"] = full_df["Standort"].str.replace("IHK zu ", "").str.replace("IHK für ", "").str.replace("IHK", "").str.replace("  ", " ").str.strip()
-                
-            # set standort as index and sort by name
-            full_df.set_index("Standort", inplace=True)
-            full_df.sort_index(inplace=True)
-
-            # fill na with 0 so it can be plotted
-            full_df = full_df.fillna(0)
-            
-            # get year and beruf name from path
-            year, beruf_name = path_to_beruf.split("/")[-2:]
-            print(f"{year}/{beruf_name}")
-            
-            # create output folder
-            output_folder = f"../data/csv_data/{year}/"
-            if not os.path.exists(output_folder):
-                print(f"Creating folder {output_folder}")
-                os.makedirs(output_folder)
-
-            output_path = f"{output_folder}/{beruf_name}.csv"
-            full_df.to_csv(output_path)
-            print(f"Saved to {output_path}")
+    return parsed_df, modules
+
+
+def is_up_to_date(output_path: str, input_paths: list[str]) -> bool:
+    """Check if output_path exists and is newer than every input file."""
+    if not os.path.exists(output_path) or not input_paths:
+        return False
+    output_mtime = os.path.getmtime(output_path)
+    return all(os.path.getmtime(path) <= output_mtime for path in input_paths)
+
+
+def convert_beruf(
+    path_to_beruf: str, force: bool = False, parser: str = "iterparse"
+) -> str | None:
+    """Convert all Standort xls files of one beruf into a single csv file.
+
+    Args:
+        path_to_beruf: The beruf folder inside a semester folder, e.g. ../data/xls_data/20234/Kaufmann-Kauffrau-im-E-Commerce
+        force: Convert even if the csv file is newer than all xls files.
+        parser: "iterparse" for the streaming parser, "pandas" for parse_dataframe.
+
+    Returns:
+        The path of the written csv file or None if it was already up to date.
+    """
+    # get year and beruf name from path
+    year, beruf_name = os.path.normpath(path_to_beruf).split(os.sep)[-2:]
+    output_path = os.path.join(CSV_DATA_PATH, year, f"{beruf_name}.csv")
+
+    # get all xls files
+    all_standorte_xls = glob.glob(os.path.join(path_to_beruf, "*.xls"))
+    if not all_standorte_xls:
+        print(f"No xls files in {path_to_beruf}")
+        return None
+    if not force and is_up_to_date(output_path, all_standorte_xls):
+        print(f"{year}/{beruf_name} is up to date")
+        return None
+
+    # parse each standort xls file and concatenate all of them at once
+    parse = parse_xls if parser == "iterparse" else parse_dataframe
+    parsed_dfs = []
+    modules = []
+    for path in all_standorte_xls:
+        parsed_df, standort_modules = parse(path)
+        modules = modules or standort_modules
+        parsed_dfs.append(parsed_df)
+    full_df = pd.concat(parsed_dfs, ignore_index=True)
+
+    # drop duplicates (bundesweit)
+    full_df = full_df.drop_duplicates()
+
+    # clean standort column so the names are uniform -> e.g. IHK zu/für Buxtehude will just be Buxtehude
+    full_df["Standort"] = (
+        full_df["Standort"]
+        .str.replace("IHK zu ", "")
+        .str.replace("IHK für ", "")
+        .str.replace("IHK", "")
+        .str.replace("  ", " ")
+        .str.strip()
+    )
+
+    # set standort as index and sort by name
+    full_df.set_index("Standort", inplace=True)
+    full_df.sort_index(inplace=True)
+
+    # fill na with 0 so it can be plotted and store counts as integers
+    full_df = normalize_columns(full_df)
+
+    print(f"{year}/{beruf_name}")
+    write_modules(modules, year, beruf_name)
+
+    # create output folder
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    full_df.to_csv(output_path)
+    print(f"Saved to {output_path}")
+    return output_path
+
+
+def run(
+    path_to_all_semesters: str,
+    jobs: int = 1,
+    force: bool = False,
+    parser: str = "iterparse",
+) -> list[str]:
+    """Convert the xls files of all semesters and berufe to csv files.
+
+    Berufe whose csv file is newer than all of their xls files are skipped unless force is set.
+    With jobs > 1 the berufe are converted in parallel worker processes.
+
+    Returns:
+        The paths of all csv files that were written.
+    """
+    # get all beruf folders in the xls_data folder
+    # e.g. ../data/xls_data/20234/Kaufmann-Kauffrau-im-E-Commerce
+    all_berufe = sorted(
+        path
+        for path in glob.glob(os.path.join(path_to_all_semesters, "*", "*"))
+        if os.path.isdir(path)
+    )
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            written = list(
+                executor.map(
+                    convert_beruf,
+                    all_berufe,
+                    [force] * len(all_berufe),
+                    [parser] * len(all_berufe),
+                )
+            )
+    else:
+        written = [
+            convert_beruf(path_to_beruf, force, parser) for path_to_beruf in all_berufe
+        ]
+
+    return [path for path in written if path is not None]
+
+
+def load_csv_tree(csv_path: str = CSV_DATA_PATH) -> pd.DataFrame:
+    """Load all converted csv files into one long dataframe.
+
+    Every row gets the semester and the beruf (file name without .csv) it belongs to.
+    """
+    frames = []
+    for path in sorted(glob.glob(os.path.join(csv_path, "*", "*.csv"))):
+        df = pd.read_csv(path)
+        df.insert(0, "semester", os.path.basename(os.path.dirname(path)))
+        df.insert(1, "beruf", os.path.basename(path).removesuffix(".csv"))
+        frames.append(df)
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_parquet_dataset(
+    csv_path: str = CSV_DATA_PATH, output_path: str = PARQUET_DATA_PATH
+) -> None:
+    """Write all csv files into a single parquet dataset.
+
+    The dataset is hive partitioned by semester and beruf, so readers can push
+    filters on these columns down to the file level and only open the files they need.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    full_df = load_csv_tree(csv_path)
+
+    # all statistic columns are numeric, so store them as such instead of strings
+    numeric_columns = full_df.columns.difference(["semester", "beruf", "Standort"])
+    full_df[numeric_columns] = full_df[numeric_columns].apply(
+        pd.to_numeric, errors="coerce"
+    )
+    for column in ["semester", "beruf", "Standort"]:
+        full_df[column] = full_df[column].astype("category")
+
+    table = pa.Table.from_pandas(full_df, preserve_index=False)
+    ds.write_dataset(
+        table,
+        output_path,
+        format="parquet",
+        partitioning=ds.partitioning(
+            pa.schema([("semester", pa.string()), ("beruf", pa.string())]),
+            flavor="hive",
+        ),
+        basename_template="part-{i}.parquet",
+        existing_data_behavior="delete_matching",
+    )
+    print(f"Saved parquet dataset to {output_path}")
+
+
+def normalize_legacy_csv(path: str) -> bool:
+    """Normalize a csv file written by an older version of this script in place.
+
+    Older files lost the decimal comma (a Bestehensquote of 94,5 % was stored as 945),
+    repeated the modules list as a string on every row and could contain a second
+    "Gesamtpunktzahl" column for exports with a broken "ø". Files without a modules
+    column are already normalized and are left untouched.
+
+    Returns:
+        True if the file was rewritten.
+    """
+    df = pd.read_csv(path)
+    if "modules" not in df.columns:
+        return False
+
+    # the same modules for every Standort, use the most common spelling
+    modules = ast.literal_eval(df["modules"].mode().iloc[0])
+    semester = os.path.basename(os.path.dirname(path))
+    write_modules(modules, semester, os.path.basename(path).removesuffix(".csv"))
+    df = df.drop(columns="modules")
+
+    if "Gesamtpunktzahl" in df.columns:
+        df[POINTS_COLUMN] = df[POINTS_COLUMN].where(
+            df[POINTS_COLUMN] != 0, df["Gesamtpunktzahl"]
+        )
+        df = df.drop(columns="Gesamtpunktzahl")
+
+    for column in PERCENT_COLUMNS:
+        df[column] = df[column] / 10
+
+    normalize_columns(df).to_csv(path, index=False)
+    return True
+
+
+def write_catalog_file(
+    csv_path: str = CSV_DATA_PATH, output_path: str = CATALOG_PATH
+) -> None:
+    """Write the catalog of all csv files that the dashboard uses to fill its dropdowns."""
+    beruf_names = {
+        beruf_folder_name(beruf_name): beruf_name for beruf_name in berufe_list
+    }
+    write_catalog(build_catalog(csv_path, beruf_names), output_path)
+    print(f"Saved catalog to {output_path}")
+
+
+def write_aggregates_file(
+    csv_path: str = CSV_DATA_PATH, output_path: str = AGGREGATES_PATH
+) -> None:
+    """Write the national and per-Bundesland aggregates of all csv files, so the dashboard only looks them up."""
+    write_aggregates(build_aggregates(load_csv_tree(csv_path)), output_path)
+    print(f"Saved aggregates to {output_path}")
+
+
+def write_trends_file(
+    written: list[str] | None = None,
+    csv_path: str = CSV_DATA_PATH,
+    output_path: str = TRENDS_PATH,
+) -> None:
+    """Update the time series of every Standort with the written csv files, or rebuild them from all csv files.
+
+    With written (the paths returned by run) only these csv files are loaded and the series
+    of their berufe are recomputed from the stored values. Without it or without a trends
+    file all csv files are loaded.
+    """
+    trends = read_trends(output_path) if written is not None else None
+    if trends is None:
+        trends = build_trends(load_csv_tree(csv_path))
+    elif written:
+        frames = []
+        for path in written:
+            df = pd.read_csv(path)
+            df.insert(0, "semester", os.path.basename(os.path.dirname(path)))
+            df.insert(1, "beruf", os.path.basename(path).removesuffix(".csv"))
+            frames.append(df)
+        trends = update_trends(trends, pd.concat(frames, ignore_index=True))
+    else:
+        print("Trends are up to date")
+        return
+    write_trends(trends, output_path)
+    print(f"Saved trends to {output_path}")
+
+
+def write_arrow_data_file(
+    csv_path: str = CSV_DATA_PATH, output_path: str = ARROW_DATA_PATH
+) -> None:
+    """Write all csv files into one Arrow IPC file, so dashboard workers share one memory-mapped copy."""
+    write_arrow_file(load_csv_tree(csv_path), output_path)
+    print(f"Saved Arrow file to {output_path}")
+
+
+def write_duckdb_file(
+    csv_path: str = CSV_DATA_PATH, output_path: str = DUCKDB_PATH
+) -> None:
+    """Write all csv files into one DuckDB table, so queries over all semesters and berufe run in DuckDB."""
+    full_df = load_csv_tree(csv_path)
+    full_df["semester"] = full_df["semester"].astype(str)
+    write_database(full_df, output_path)
+    print(f"Saved DuckDB database to {output_path}")
+
 
 if __name__ == "__main__":
-    path_to_all_semesters = os.path.join(os.path.dirname(__file__), "../data/xls_data/")
-    print(f"Converting all xls files in {path_to_all_semesters} to csv files in {path_to_all_semesters}/../csv_data/")
-    run(path_to_all_semesters)
\ No newline at end of file
+    args = parse_args()
+    written = None
+    if args.normalize_csv:
+        for path in sorted(glob.glob(os.path.join(CSV_DATA_PATH, "*", "*.csv"))):
+            if normalize_legacy_csv(path):
+                print(f"Normalized {path}")
+    elif not args.from_csv:
+        path_to_all_semesters = os.path.join(
+            os.path.dirname(__file__), "../data/xls_data/"
+        )
+        print(
+            f"Converting all xls files in {path_to_all_semesters} to csv files in {CSV_DATA_PATH}"
+        )
+        written = run(
+            path_to_all_semesters, jobs=args.jobs, force=args.force, parser=args.parser
+        )
+    write_catalog_file()
+    write_aggregates_file()
+    # only the berufe of converted files are recomputed, --from-csv and --normalize-csv rebuild all series
+    write_trends_file(written)
+    if args.parquet:
+        write_parquet_dataset()
+    if args.arrow:
+        write_arrow_data_file()
+    if args.duckdb:
+        write_duckdb_file()
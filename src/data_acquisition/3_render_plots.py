@@ -0,0 +1,187 @@
+""" Render the static plot gallery in data/plots for every semester and Beruf.
+
+Every (semester, beruf) gets one image with the participants and the Bestehensquote
+per Standort and the grade distribution, written to data/plots/<semester> (<Sommer|Winter>)/<beruf>.<format>.
+The plots are rendered in parallel worker processes, plots that are newer than their csv file are skipped.
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+# render without a display, also in worker processes
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+
+# Add the root directory of the project to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
+
+from src.backend.aggregates import NATIONAL_SCOPE, get_aggregate
+from src.backend.catalog import CSV_DATA_PATH, DATA_PATH, load_catalog
+from src.backend.data_functions import get_dataframe
+
+PLOTS_PATH = os.path.join(DATA_PATH, "plots")
+GRADE_COLORS = ["blue", "orange", "green", "red", "purple", "brown"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=["png", "svg"],
+        default=["png"],
+        help="Image formats to write",
+    )
+    parser.add_argument(
+        "--semesters",
+        nargs="+",
+        default=["all"],
+        help="Semesters to render (20232 20234 ...) or all",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of worker processes that render plots in parallel",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Render all plots, even if they are newer than their csv file",
+    )
+    return parser.parse_args()
+
+
+def semester_folder_name(semester: str) -> str:
+    """Folder name of a semester in data/plots (20232 -> 20232 (Sommer), 20234 -> 20234 (Winter))."""
+    return f"{semester} ({'Sommer' if semester.endswith('2') else 'Winter'})"
+
+
+def plot_paths(
+    semester: str, beruf: str, formats: list[str], plots_path: str = PLOTS_PATH
+) -> list[str]:
+    folder = os.path.join(plots_path, semester_folder_name(semester))
+    return [os.path.join(folder, f"{beruf}.{image_format}") for image_format in formats]
+
+
+def create_figure(semester: str, beruf: str) -> plt.Figure:
+    """Create the gallery figure of a beruf in a semester."""
+    df = get_dataframe(semester, beruf)
+    standorte = df[df["Standort"] != NATIONAL_SCOPE].sort_values(
+        "Anzahl Teilnehmer", ascending=False
+    )
+    national = df[df["Standort"] == NATIONAL_SCOPE]
+    total = (
+        national["Anzahl Teilnehmer"].iloc[0]
+        if len(national)
+        else standorte["Anzahl Teilnehmer"].sum()
+    )
+
+    fig, (participants_ax, quote_ax, grades_ax) = plt.subplots(
+        3, 1, figsize=(12, 18), gridspec_kw={"height_ratios": [2, 2, 1]}
+    )
+    fig.suptitle(f"Statistiken für {beruf}\nJahr: {semester}")
+
+    standorte.plot.bar(
+        x="Standort",
+        y="Anzahl Teilnehmer",
+        ax=participants_ax,
+        color="skyblue",
+        legend=False,
+    )
+    participants_ax.set_title("Anzahl Teilnehmer pro Standort")
+    participants_ax.set_ylabel("Anzahl Teilnehmer")
+    participants_ax.text(
+        0.5,
+        0.9,
+        f"Gesamtanzahl Teilnehmer: {total}",
+        transform=participants_ax.transAxes,
+        ha="center",
+    )
+
+    standorte.plot.bar(
+        x="Standort", y="Bestehensquote", ax=quote_ax, color="green", legend=False
+    )
+    quote_ax.set_title("Bestehensquote pro Standort")
+    quote_ax.set_ylabel("Bestehensquote in Prozent")
+
+    # participant-weighted grade distribution of all Standorte
+    aggregate = get_aggregate(semester, beruf)
+    grade_columns = [f"Note {grade} in Prozent" for grade in range(1, 7)]
+    grades = [
+        aggregate[column] if aggregate else standorte[column].mean()
+        for column in grade_columns
+    ]
+    grades_ax.bar(grade_columns, grades, color=GRADE_COLORS)
+    grades_ax.set_title("Notenverteilung (Note 1 bis 6)")
+    grades_ax.set_ylabel("Anteil in Prozent")
+
+    # leave room for the two lines of the title
+    fig.tight_layout(rect=(0, 0, 1, 0.97))
+    return fig
+
+
+def render_plot(
+    semester: str, beruf: str, formats: list[str], force: bool = False
+) -> list[str]:
+    """Render the plot of a beruf in a semester in all formats and return the written paths."""
+    paths = plot_paths(semester, beruf, formats)
+    csv_path = os.path.join(CSV_DATA_PATH, semester, f"{beruf}.csv")
+    csv_mtime = os.path.getmtime(csv_path)
+    paths = [
+        path
+        for path in paths
+        if force or not os.path.exists(path) or os.path.getmtime(path) < csv_mtime
+    ]
+    if not paths:
+        return []
+
+    fig = create_figure(semester, beruf)
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fig.savefig(path)
+    plt.close(fig)
+    return paths
+
+
+def run(
+    semesters: list[str], formats: list[str], jobs: int = 1, force: bool = False
+) -> list[str]:
+    """Render the plots of all berufe of the given semesters, with jobs > 1 in parallel worker processes."""
+    catalog = load_catalog()["semesters"]
+    plots = [
+        (semester, beruf)
+        for semester in (catalog if semesters == ["all"] else semesters)
+        for beruf in catalog.get(semester, {"berufe": {}})["berufe"]
+    ]
+
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            written = executor.map(
+                render_plot,
+                [semester for semester, _ in plots],
+                [beruf for _, beruf in plots],
+                [formats] * len(plots),
+                [force] * len(plots),
+            )
+            written = [path for paths in written for path in paths]
+    else:
+        written = [
+            path
+            for semester, beruf in plots
+            for path in render_plot(semester, beruf, formats, force)
+        ]
+
+    return written
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    written = run(args.semesters, args.formats, jobs=args.jobs, force=args.force)
+    for path in written:
+        print(f"Saved {path}")
+    print(f"Rendered {len(written)} plots")
@@ -0,0 +1,298 @@
+""" Concurrent scraper for the IHK Prüfungsstatistik based on playwright.async_api.
+
+Every worker owns its own browser context (own cookies, so its own selected Termin)
+and takes jobs from a bounded queue. A job is one (semester, beruf, standort)
+download. The Standorte of each Beruf are discovered with the same worker pool
+before the downloads start.
+
+All requests of all workers go through one rate limiter, failed jobs are retried
+with exponential backoff. The site can be replaced with the recorded pages of
+stub_server.py via --base-url to run the scraper offline.
+"""
+
+import asyncio
+import os
+from dataclasses import dataclass
+from urllib.parse import urljoin
+
+from berufe import berufe_list, beruf_folder_name
+from journal import JobJournal
+from playwright.async_api import BrowserContext, Page, async_playwright
+from rate_limiter import RateLimiter
+
+BUNDESWEIT = "bundesweit"
+# journal entry of the Standort discovery of a beruf, it has no file of its own
+STANDORTE_DISCOVERY = "Standorte"
+
+
+@dataclass
+class Job:
+    semester: str
+    beruf_name: str
+    beruf_id: str
+    # None while the Standorte of the beruf are not known yet
+    standort: str | None = None
+
+
+class Worker:
+    """A browser context with one page and the Termin currently selected in its session."""
+
+    def __init__(self, context: BrowserContext, base_url: str, limiter: RateLimiter):
+        self.context = context
+        self.base_url = base_url
+        self.limiter = limiter
+        self.page: Page | None = None
+        self.semester: str | None = None
+        self.beruf_id: str | None = None
+
+    async def goto(self, url: str) -> None:
+        await self.limiter.wait_async()
+        await self.page.goto(url)
+        await self.page.wait_for_load_state("networkidle")
+
+    async def select_semester(self, semester: str) -> None:
+        """Select the Termin on the start page, the site stores it in the session."""
+        if self.page is None:
+            self.page = await self.context.new_page()
+        if self.semester == semester:
+            return
+        await self.goto(self.base_url)
+        await self.limiter.wait_async()
+        await self.page.locator("select[name='termin']").select_option(semester)
+        await self.page.wait_for_load_state("networkidle")
+        self.semester = semester
+        self.beruf_id = None
+
+    async def open_beruf(self, job: Job) -> None:
+        await self.select_semester(job.semester)
+        if self.beruf_id != job.beruf_id:
+            await self.goto(
+                urljoin(self.base_url, f"Auswertung.cfm?Beruf={job.beruf_id}")
+            )
+            self.beruf_id = job.beruf_id
+
+    async def list_semesters(self) -> list[str]:
+        """Get all Termine of the start page (20234, 20232, ...)."""
+        if self.page is None:
+            self.page = await self.context.new_page()
+        await self.goto(self.base_url)
+        self.semester = self.beruf_id = None
+        return await self.page.locator("select[name='termin'] option").evaluate_all(
+            "options => options.map(option => option.value)"
+        )
+
+    async def list_berufe(self, semester: str) -> list[tuple[str, str]]:
+        """Get (name, id) of all berufe of a semester."""
+        await self.select_semester(semester)
+        options = await self.page.locator("select.berufe option").all()
+        return [
+            (
+                (await option.text_content()).strip(),
+                (await option.get_attribute("value")).strip(),
+            )
+            for option in options
+        ]
+
+    async def list_standorte(self, job: Job) -> list[str]:
+        """Get the IHK Standorte listed below the "IHK-Standort" delimiter of the pm1 select."""
+        await self.open_beruf(job)
+        names = [
+            (await option.text_content()).strip()
+            for option in await self.page.locator("select[name='pm1'] option").all()
+        ]
+        ihk_index = next(
+            (i for i, name in enumerate(names) if "IHK-Standort" in name), None
+        )
+        return names[ihk_index + 1 :] if ihk_index is not None else []
+
+    async def download(self, job: Job, excel_file_path: str) -> bool:
+        """Download the Excel export of a Standort, returns False if the page has none."""
+        await self.open_beruf(job)
+        if job.standort != BUNDESWEIT:
+            await self.limiter.wait_async()
+            await self.page.locator("select[name='pm1']").select_option(job.standort)
+            await self.page.wait_for_load_state("networkidle")
+            # the selection changed the page, the next Standort has to reload it
+            self.beruf_id = None
+
+        excel_download_locator = self.page.locator("a[href*='Excel']")
+        if await excel_download_locator.count() == 0:
+            return False
+
+        await self.limiter.wait_async()
+        async with self.page.expect_download() as download_info:
+            await excel_download_locator.first.click()
+        download = await download_info.value
+        # write to a temporary file first, so an interrupted download never looks finished
+        tmp_path = f"{excel_file_path}.part"
+        await download.save_as(tmp_path)
+        os.replace(tmp_path, excel_file_path)
+        return True
+
+
+async def run_jobs(
+    workers: list[Worker], jobs: list, handler, retries: int, queue_size: int
+) -> tuple[list, list]:
+    """Process jobs with all workers through a bounded queue.
+
+    handler(worker, job) is retried up to `retries` times with exponential backoff.
+
+    Returns:
+        The (job, result) pairs of all successful jobs and the (job, exception) pairs of all failed jobs.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    results, failures = [], []
+
+    async def produce():
+        for job in jobs:
+            await queue.put(job)
+        for _ in workers:
+            await queue.put(None)
+
+    async def consume(worker: Worker):
+        while (job := await queue.get()) is not None:
+            for attempt in range(retries + 1):
+                try:
+                    results.append((job, await handler(worker, job)))
+                    break
+                except Exception as e:
+                    if attempt == retries:
+                        print(f"Failed {job}: {e}")
+                        failures.append((job, e))
+                    else:
+                        # start from a clean state, the page may be anywhere now
+                        worker.semester = worker.beruf_id = None
+                        await asyncio.sleep(2**attempt)
+
+    await asyncio.gather(produce(), *(consume(worker) for worker in workers))
+    return results, failures
+
+
+def excel_file_path(data_path: str, job: Job) -> str:
+    return os.path.join(
+        data_path,
+        job.semester,
+        beruf_folder_name(job.beruf_name),
+        f"{job.standort}.xls",
+    )
+
+
+async def plan_jobs(
+    workers: list[Worker], args, data_path: str, journal: JobJournal
+) -> list[Job]:
+    """Discover all berufe and Standorte, record them in the journal and return the jobs that have to run."""
+    all_semesters = await workers[0].list_semesters()
+    semesters = all_semesters if args.semesters[0] == "all" else args.semesters
+    assert set(semesters).issubset(
+        set(all_semesters)
+    ), f"termine must be a subset of all_termine. \nAvailable semesters: {all_semesters}\nProvided semesters: {semesters}"
+
+    all_berufe = []
+    for semester in semesters:
+        berufe = await workers[0].list_berufe(semester)
+        selected = [name for name, _ in berufe] if args.berufe == "all" else berufe_list
+        all_berufe.extend(
+            Job(semester, name, beruf_id)
+            for name, beruf_id in berufe
+            if name in selected
+        )
+
+    async def standorte_handler(worker: Worker, job: Job):
+        return [BUNDESWEIT] + await worker.list_standorte(job)
+
+    discovered, failures = await run_jobs(
+        workers, all_berufe, standorte_handler, args.retries, args.queue_size
+    )
+
+    # a beruf whose Standorte could not be listed is recorded as failed, so the run reports it
+    # and --only failed retries it
+    for beruf_job, error in failures:
+        print(
+            f"Standort discovery failed for {beruf_job.beruf_name} ({beruf_job.semester}): {error}"
+        )
+        path = excel_file_path(
+            data_path,
+            Job(
+                beruf_job.semester,
+                beruf_job.beruf_name,
+                beruf_job.beruf_id,
+                STANDORTE_DISCOVERY,
+            ),
+        )
+        journal.plan(
+            beruf_job.semester,
+            beruf_job.beruf_name,
+            STANDORTE_DISCOVERY,
+            path,
+            beruf_job.beruf_id,
+        )
+        journal.failed(
+            beruf_job.semester, beruf_job.beruf_name, STANDORTE_DISCOVERY, error
+        )
+
+    jobs = []
+    for beruf_job, standorte in discovered:
+        if (
+            journal.state(beruf_job.semester, beruf_job.beruf_name, STANDORTE_DISCOVERY)
+            is not None
+        ):
+            journal.done(
+                beruf_job.semester, beruf_job.beruf_name, STANDORTE_DISCOVERY, None
+            )
+        for standort in standorte:
+            job = Job(
+                beruf_job.semester, beruf_job.beruf_name, beruf_job.beruf_id, standort
+            )
+            path = excel_file_path(data_path, job)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if journal.should_run(
+                job.semester, job.beruf_name, standort, path, args.only, job.beruf_id
+            ):
+                jobs.append(job)
+    return jobs
+
+
+async def run_async(args, data_path: str, journal: JobJournal) -> None:
+    """Download all missing Standort files of the selected semesters and berufe concurrently."""
+    limiter = RateLimiter(args.rate)
+
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch(headless=True)
+        contexts = [
+            await browser.new_context(
+                accept_downloads=True,
+                record_har_path=f"{args.record_har}.{i}.har"
+                if args.record_har
+                else None,
+            )
+            for i in range(args.concurrency)
+        ]
+        workers = [Worker(context, args.base_url, limiter) for context in contexts]
+
+        jobs = await plan_jobs(workers, args, data_path, journal)
+        if args.plan_only:
+            jobs = []
+        print(f"Downloading {len(jobs)} files with {len(workers)} browser contexts")
+
+        async def download_handler(worker: Worker, job: Job):
+            path = excel_file_path(data_path, job)
+            journal.start(job.semester, job.beruf_name, job.standort)
+            if await worker.download(job, path):
+                journal.done(job.semester, job.beruf_name, job.standort, path)
+            else:
+                print(
+                    f"No Excel download found for {job.standort} ({job.beruf_name}, {job.semester})"
+                )
+                journal.done(job.semester, job.beruf_name, job.standort, None)
+
+        _, failures = await run_jobs(
+            workers, jobs, download_handler, args.retries, args.queue_size
+        )
+        for job, error in failures:
+            journal.failed(job.semester, job.beruf_name, job.standort, error)
+        print(f"Done, {len(jobs) - len(failures)} of {len(jobs)} jobs succeeded")
+
+        for context in contexts:
+            # closing the context writes the har recording
+            await context.close()
+        await browser.close()
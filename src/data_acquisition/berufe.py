@@ -8,5 +8,10 @@ berufe_list = [
     "Kaufmann / Kauffrau im E-Commerce",
     "Kaufmann / Kauffrau für Marketingkommunikation",
     "Kaufmann / Kauffrau für Büromanagement",
-    "Kaufmann / Kauffrau für Dialogmarketing"
+    "Kaufmann / Kauffrau für Dialogmarketing",
 ]
+
+
+def beruf_folder_name(beruf_name: str) -> str:
+    """Folder and file name used for a Beruf (Kaufmann / Kauffrau im E-Commerce -> Kaufmann-Kauffrau-im-E-Commerce)."""
+    return beruf_name.replace("/", "").replace(" ", "-").replace("--", "-")
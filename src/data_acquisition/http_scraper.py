@@ -0,0 +1,260 @@
+""" Scraper that downloads the Excel exports over plain HTTP.
+
+The browser is only started once per semester: it selects the Termin on the start
+page in one browser context per thread (the site keeps it and the selected Beruf
+and Standort in the session) and hands the session cookies and the Beruf ids to one
+requests.Session per thread. Everything else is plain HTTP over keep-alive
+connections: the Beruf page is parsed for the Standort form (select pm1), the form
+is submitted for each Standort and the Excel link of the result is streamed to disk.
+Every thread downloads its berufe one after another in its own session.
+"""
+
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+import lxml.html
+import requests
+from berufe import berufe_list, beruf_folder_name
+from journal import JobJournal
+from playwright.sync_api import sync_playwright
+from rate_limiter import RateLimiter
+
+BUNDESWEIT = "bundesweit"
+CHUNK_SIZE = 64 * 1024
+
+
+def discover_semesters(base_url: str) -> list[str]:
+    """Get all Termine of the start page (20234, 20232, ...)."""
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True)
+        page = browser.new_page()
+        page.goto(base_url)
+        semesters = page.locator("select[name='termin'] option").evaluate_all(
+            "options => options.map(option => option.value)"
+        )
+        browser.close()
+    return semesters
+
+
+def discover_sessions(
+    base_url: str, semester: str, count: int
+) -> tuple[list[tuple[str, str]], list[list[dict]], str]:
+    """Select the semester in `count` browser contexts and return the berufe (name, id),
+    the cookies of every context and the user agent."""
+    with sync_playwright() as playwright:
+        browser = playwright.chromium.launch(headless=True)
+        cookies = []
+        for _ in range(count):
+            context = browser.new_context()
+            page = context.new_page()
+            page.goto(base_url)
+            page.locator("select[name='termin']").select_option(semester)
+            page.wait_for_load_state("networkidle")
+            cookies.append(context.cookies())
+        berufe = [
+            (option.text_content().strip(), option.get_attribute("value").strip())
+            for option in page.locator("select.berufe option").all()
+        ]
+        user_agent = page.evaluate("() => navigator.userAgent")
+        browser.close()
+    return berufe, cookies, user_agent
+
+
+def create_session(cookies: list[dict], user_agent: str) -> requests.Session:
+    """Create a requests session with the cookies of one browser context."""
+    session = requests.Session()
+    session.headers["User-Agent"] = user_agent
+    for cookie in cookies:
+        session.cookies.set(
+            cookie["name"],
+            cookie["value"],
+            domain=cookie["domain"],
+            path=cookie["path"],
+        )
+    return session
+
+
+class HttpScraper:
+    def __init__(
+        self,
+        session: requests.Session,
+        base_url: str,
+        limiter: RateLimiter,
+        retries: int,
+        journal: JobJournal,
+        only: str,
+    ):
+        self.journal = journal
+        self.only = only
+        self.session = session
+        self.base_url = base_url
+        self.limiter = limiter
+        self.retries = retries
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Send a request, retrying failed ones with exponential backoff."""
+        for attempt in range(self.retries + 1):
+            self.limiter.wait()
+            try:
+                response = self.session.request(method, url, timeout=60, **kwargs)
+                response.raise_for_status()
+                return response
+            except requests.RequestException:
+                if attempt == self.retries:
+                    raise
+                time.sleep(2**attempt)
+
+    def get_html(self, method: str, url: str, **kwargs) -> lxml.html.HtmlElement:
+        response = self.request(method, url, **kwargs)
+        return lxml.html.fromstring(response.content, base_url=response.url)
+
+    def get_standorte(
+        self, beruf_id: str
+    ) -> tuple[lxml.html.HtmlElement, dict[str, str]]:
+        """Get the Beruf page and the IHK Standorte (name -> pm1 value) below the "IHK-Standort" delimiter."""
+        beruf_page = self.get_html(
+            "GET", urljoin(self.base_url, f"Auswertung.cfm?Beruf={beruf_id}")
+        )
+        options = beruf_page.xpath("//select[@name='pm1']/option")
+        names = [option.text_content().strip() for option in options]
+        ihk_index = next(
+            (i for i, name in enumerate(names) if "IHK-Standort" in name), None
+        )
+        if ihk_index is None:
+            return beruf_page, {}
+        return beruf_page, {
+            option.text_content().strip(): option.get(
+                "value", option.text_content().strip()
+            )
+            for option in options[ihk_index + 1 :]
+        }
+
+    def standort_page(
+        self, beruf_page: lxml.html.HtmlElement, value: str
+    ) -> lxml.html.HtmlElement:
+        """Submit the Standort form of the Beruf page with pm1 set to value."""
+        select = beruf_page.xpath("//select[@name='pm1']")[0]
+        form = next(select.iterancestors("form"))
+        fields = dict(form.form_values())
+        fields["pm1"] = value
+        action = urljoin(beruf_page.base_url, form.get("action", ""))
+        if form.get("method", "get").lower() == "post":
+            return self.get_html("POST", action, data=fields)
+        return self.get_html("GET", action, params=fields)
+
+    def download_excel(self, page: lxml.html.HtmlElement, excel_file_path: str) -> bool:
+        """Stream the Excel export linked on page to disk, returns False if the page has none."""
+        links = page.xpath("//a[contains(@href, 'Excel')]/@href")
+        if not links:
+            return False
+        response = self.request("GET", urljoin(page.base_url, links[0]), stream=True)
+        # write to a temporary file first, so an interrupted download never looks finished
+        tmp_path = f"{excel_file_path}.part"
+        with open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(tmp_path, excel_file_path)
+        return True
+
+    def download_beruf(
+        self,
+        semester_folder: str,
+        beruf_name: str,
+        beruf_id: str,
+        plan_only: bool = False,
+    ) -> None:
+        """Download all Standort files of a beruf that the journal has not marked as done."""
+        semester = os.path.basename(semester_folder)
+        berufe_folder = os.path.join(semester_folder, beruf_folder_name(beruf_name))
+        os.makedirs(berufe_folder, exist_ok=True)
+
+        beruf_page, standorte = self.get_standorte(beruf_id)
+        jobs = [
+            (standort_name, value, os.path.join(berufe_folder, f"{standort_name}.xls"))
+            for standort_name, value in [(BUNDESWEIT, None)] + list(standorte.items())
+        ]
+        jobs = [
+            job
+            for job in jobs
+            if self.journal.should_run(
+                semester, beruf_name, job[0], job[2], self.only, beruf_id
+            )
+        ]
+        if plan_only:
+            return
+
+        for standort_name, value, excel_file_path in jobs:
+            self.journal.start(semester, beruf_name, standort_name)
+            try:
+                # the Beruf page itself links the bundesweit export
+                page = (
+                    beruf_page
+                    if value is None
+                    else self.standort_page(beruf_page, value)
+                )
+                if self.download_excel(page, excel_file_path):
+                    self.journal.done(
+                        semester, beruf_name, standort_name, excel_file_path
+                    )
+                else:
+                    print(f"No Excel download found for {standort_name} ({beruf_name})")
+                    self.journal.done(semester, beruf_name, standort_name, None)
+            except Exception as e:
+                print(f"Failed {standort_name} ({beruf_name}, {semester}): {e}")
+                self.journal.failed(semester, beruf_name, standort_name, e)
+
+
+def run_http(args, data_path: str, journal: JobJournal) -> None:
+    """Download the selected semesters and berufe with a browser only for the session setup."""
+    limiter = RateLimiter(args.rate)
+    semesters = (
+        discover_semesters(args.base_url)
+        if args.semesters[0] == "all"
+        else args.semesters
+    )
+    for semester in semesters:
+        berufe, cookies, user_agent = discover_sessions(
+            args.base_url, semester, args.concurrency
+        )
+        selected = [name for name, _ in berufe] if args.berufe == "all" else berufe_list
+        berufe = [(name, beruf_id) for name, beruf_id in berufe if name in selected]
+        print(f"Downloading {len(berufe)} berufe of {semester} over HTTP")
+
+        # the site keeps the selected Beruf and Standort in the server-side session,
+        # so every thread has its own session and downloads its berufe one after another
+        scrapers = [
+            HttpScraper(
+                create_session(context_cookies, user_agent),
+                args.base_url,
+                limiter,
+                args.retries,
+                journal,
+                args.only,
+            )
+            for context_cookies in cookies
+        ]
+        semester_folder = os.path.join(data_path, semester)
+        pending = queue.Queue()
+        for name, beruf_id in berufe:
+            pending.put((name, beruf_id))
+
+        def work(scraper: HttpScraper) -> None:
+            while True:
+                try:
+                    name, beruf_id = pending.get_nowait()
+                except queue.Empty:
+                    return
+                try:
+                    scraper.download_beruf(
+                        semester_folder, name, beruf_id, args.plan_only
+                    )
+                except Exception as e:
+                    print(f"Failed {name} ({semester}): {e}")
+
+        with ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
+            list(executor.map(work, scrapers))
+        for scraper in scrapers:
+            scraper.session.close()
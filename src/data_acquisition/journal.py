@@ -0,0 +1,181 @@
+""" Persistent journal of the scraper jobs.
+
+Every (semester, beruf, standort) download is recorded in a SQLite file with its state:
+
+    planned -> in_flight -> done | failed
+
+together with the sha256 checksum of the downloaded file and timestamps. Jobs that
+were in flight when a crawl was interrupted are planned again on the next start, so
+a crawl resumes exactly where it stopped.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+PLANNED = "planned"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+# which states are run for the --only option of the scraper
+STATES_TO_RUN = {
+    "all": {PLANNED, FAILED},
+    "new": {PLANNED},
+    "failed": {FAILED},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    semester TEXT NOT NULL,
+    beruf TEXT NOT NULL,
+    standort TEXT NOT NULL,
+    beruf_id TEXT,
+    path TEXT,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    checksum TEXT,
+    error TEXT,
+    planned_at TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    PRIMARY KEY (semester, beruf, standort)
+)
+"""
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def file_checksum(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+class JobJournal:
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # the http mode writes from several threads, all access goes through the lock
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._connection:
+            self._connection.execute(SCHEMA)
+            # jobs of an interrupted crawl
+            self._connection.execute(
+                "UPDATE jobs SET state = ? WHERE state = ?", (PLANNED, IN_FLIGHT)
+            )
+
+    def _execute(self, sql: str, parameters: tuple = ()) -> list:
+        with self._lock, self._connection:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    def state(self, semester: str, beruf: str, standort: str) -> str | None:
+        rows = self._execute(
+            "SELECT state FROM jobs WHERE semester = ? AND beruf = ? AND standort = ?",
+            (semester, beruf, standort),
+        )
+        return rows[0][0] if rows else None
+
+    def plan(
+        self,
+        semester: str,
+        beruf: str,
+        standort: str,
+        path: str,
+        beruf_id: str | None = None,
+    ) -> str:
+        """Record a job as planned if it is not known yet and return its state.
+
+        A job that is done but whose file is missing or changed is planned again.
+        Files that already exist without a journal entry (from older crawls) are recorded as done.
+        """
+        state = self.state(semester, beruf, standort)
+        if state is None:
+            if os.path.exists(path):
+                self._execute(
+                    "INSERT INTO jobs (semester, beruf, standort, beruf_id, path, state, checksum, planned_at, finished_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        semester,
+                        beruf,
+                        standort,
+                        beruf_id,
+                        path,
+                        DONE,
+                        file_checksum(path),
+                        now(),
+                        now(),
+                    ),
+                )
+                return DONE
+            self._execute(
+                "INSERT INTO jobs (semester, beruf, standort, beruf_id, path, state, planned_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (semester, beruf, standort, beruf_id, path, PLANNED, now()),
+            )
+            return PLANNED
+
+        if state == DONE:
+            checksum = self._execute(
+                "SELECT checksum FROM jobs WHERE semester = ? AND beruf = ? AND standort = ?",
+                (semester, beruf, standort),
+            )[0][0]
+            # done without checksum: the Standort has no Excel export
+            if checksum is not None and (
+                not os.path.exists(path) or file_checksum(path) != checksum
+            ):
+                self._execute(
+                    "UPDATE jobs SET state = ?, planned_at = ? WHERE semester = ? AND beruf = ? AND standort = ?",
+                    (PLANNED, now(), semester, beruf, standort),
+                )
+                return PLANNED
+        return state
+
+    def should_run(
+        self,
+        semester: str,
+        beruf: str,
+        standort: str,
+        path: str,
+        only: str = "all",
+        beruf_id: str | None = None,
+    ) -> bool:
+        """Plan the job and check if it has to run for the given --only option."""
+        return (
+            self.plan(semester, beruf, standort, path, beruf_id) in STATES_TO_RUN[only]
+        )
+
+    def start(self, semester: str, beruf: str, standort: str) -> None:
+        self._execute(
+            "UPDATE jobs SET state = ?, attempts = attempts + 1, started_at = ?, error = NULL "
+            "WHERE semester = ? AND beruf = ? AND standort = ?",
+            (IN_FLIGHT, now(), semester, beruf, standort),
+        )
+
+    def done(self, semester: str, beruf: str, standort: str, path: str | None) -> None:
+        """Mark a job as done, path is None if the Standort has no Excel export."""
+        checksum = file_checksum(path) if path and os.path.exists(path) else None
+        self._execute(
+            "UPDATE jobs SET state = ?, checksum = ?, finished_at = ? WHERE semester = ? AND beruf = ? AND standort = ?",
+            (DONE, checksum, now(), semester, beruf, standort),
+        )
+
+    def failed(
+        self, semester: str, beruf: str, standort: str, error: Exception | str
+    ) -> None:
+        self._execute(
+            "UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE semester = ? AND beruf = ? AND standort = ?",
+            (FAILED, str(error), now(), semester, beruf, standort),
+        )
+
+    def summary(self) -> dict[str, int]:
+        """Number of jobs per state."""
+        return dict(self._execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,32 @@
+""" Rate limiter shared by the async and http scraper modes. """
+
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """Allow at most `rate` requests per second over all threads or asyncio tasks."""
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take the next free request slot and return the seconds until it starts."""
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        return delay
+
+    def wait(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,103 @@
+""" Local stand-in for pes.ihk.de that replays recorded pages.
+
+Record the pages with `1_statistics_scraper.py --mode async --record-har recording`,
+which writes one har file per browser context. Then serve them with
+
+    python stub_server.py recording.*.har --port 8000
+
+and run the scraper offline with `--base-url http://localhost:8000/`.
+Requests are matched on method, path, query and (for POST) body. Requests that
+were never recorded are answered with 404.
+"""
+
+import argparse
+import base64
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+# headers that do not fit the replayed body anymore
+SKIPPED_HEADERS = {
+    "content-encoding",
+    "content-length",
+    "transfer-encoding",
+    "connection",
+}
+
+
+def request_key(method: str, url: str, body: str = "") -> tuple[str, str, str]:
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    return method.upper(), f"{path}?{parts.query}" if parts.query else path, body
+
+
+def load_har_files(paths: list[str]) -> dict:
+    """Map request keys to (status, headers, body) of the recorded responses."""
+    responses = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)["log"]["entries"]
+        for entry in entries:
+            request, response = entry["request"], entry["response"]
+            content = response.get("content", {})
+            body = content.get("text", "")
+            body = (
+                base64.b64decode(body)
+                if content.get("encoding") == "base64"
+                else body.encode("utf-8")
+            )
+            headers = [
+                (header["name"], header["value"])
+                for header in response.get("headers", [])
+                if header["name"].lower() not in SKIPPED_HEADERS
+            ]
+            key = request_key(
+                request["method"],
+                request["url"],
+                request.get("postData", {}).get("text", ""),
+            )
+            responses[key] = (response["status"], headers, body)
+    return responses
+
+
+def create_server(responses: dict, port: int) -> ThreadingHTTPServer:
+    class StubHandler(BaseHTTPRequestHandler):
+        def replay(self, body: str = "") -> None:
+            response = responses.get(request_key(self.command, self.path, body))
+            if response is None:
+                self.send_error(404, "Not recorded")
+                return
+            status, headers, content = response
+            self.send_response(status)
+            for name, value in headers:
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def do_GET(self):
+            self.replay()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.replay(self.rfile.read(length).decode("utf-8", errors="replace"))
+
+    return ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "har_files", nargs="+", help="har files recorded with --record-har"
+    )
+    parser.add_argument("--port", type=int, default=8000)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    responses = load_har_files(args.har_files)
+    print(
+        f"Serving {len(responses)} recorded responses on http://127.0.0.1:{args.port}/"
+    )
+    create_server(responses, args.port).serve_forever()
@@ -0,0 +1,207 @@
+""" Streaming parser for the xls files exported by the IHK website.
+
+The exported files are html fragments (a <table> without <html> and <body>), not real
+Excel files. pd.read_html builds a dataframe for every table and most of it is thrown
+away again by parse_dataframe in 2_convert_xls_to_csv.py. This parser walks the html
+once with lxml.etree.iterparse and only keeps the cell texts needed for the
+Standort values and the module names.
+
+Run `python xls_parser.py --benchmark <xls files or folders>` to compare it with the
+pd.read_html based parse_dataframe.
+"""
+
+import argparse
+import glob
+import importlib
+import io
+import os
+import time
+
+import pandas as pd
+from lxml import etree
+
+LAST_STATISTIC = "Note 6 in Prozent"
+POINTS_COLUMN = "ø Gesamtpunktzahl"
+# spellings of the "ø" column for exports with broken encoding
+BROKEN_POINTS_COLUMNS = {"ï¿½ Gesamtpunktzahl", "� Gesamtpunktzahl"}
+
+
+def read_html_bytes(path: str) -> bytes:
+    """Read an exported file as utf-8 encoded html.
+
+    The exports are usually windows-1252 encoded, files fixed by deprecated_fix_xls_files.py
+    are utf-8. Bytes that are invalid in both are replaced instead of failing.
+    """
+    with open(path, "rb") as f:
+        content = f.read()
+    try:
+        content.decode("utf-8")
+        return content
+    except UnicodeDecodeError:
+        return content.decode("cp1252", errors="replace").encode("utf-8")
+
+
+def iter_tables(content: bytes):
+    """Yield every table of the html as a list of rows with the stripped cell texts.
+
+    Header rows (in <thead> or only <th> cells) and empty rows are skipped, the same
+    way pd.read_html handles them. Cells spanning multiple columns are repeated.
+    """
+    rows, row, row_is_header = [], [], True
+    events = etree.iterparse(
+        io.BytesIO(content),
+        events=("start", "end"),
+        tag=("table", "tr", "td", "th"),
+        html=True,
+        encoding="utf-8",
+        recover=True,
+    )
+    for event, element in events:
+        if event == "start":
+            if element.tag == "tr":
+                row, row_is_header = [], True
+            continue
+
+        if element.tag in ("td", "th"):
+            text = " ".join("".join(element.itertext()).split())
+            row.extend([text] * int(element.get("colspan", 1) or 1))
+            row_is_header = row_is_header and element.tag == "th"
+        elif element.tag == "tr":
+            in_thead = (
+                element.getparent() is not None and element.getparent().tag == "thead"
+            )
+            if any(row) and not (in_thead or (row_is_header and not rows)):
+                rows.append(row)
+            # free the parsed row, it is not needed anymore
+            element.clear()
+        elif element.tag == "table":
+            yield rows
+            rows = []
+            element.clear()
+
+
+def to_number(text: str) -> float:
+    """Convert a German formatted number (1.234,5) to a float, empty cells become NaN."""
+    text = text.replace(".", "").replace(",", ".")
+    try:
+        return float(text)
+    except ValueError:
+        return float("nan")
+
+
+def parse_xls(path: str) -> tuple[pd.DataFrame, list[str]]:
+    """Parse one exported Standort file, with the same result as parse_dataframe.
+
+    Returns:
+        A dataframe with one row per Standort column of the export (statistics up to
+        "Note 6 in Prozent" plus a "Standort" column) and the list of exam modules.
+    """
+    tables = [table for table in iter_tables(read_html_bytes(path)) if table]
+
+    # put the tables next to each other, keeping only the rows that all of them have
+    rows = []
+    for row_parts in zip(*tables):
+        row = []
+        for table, part in zip(tables, row_parts):
+            width = max(len(table_row) for table_row in table)
+            row.extend(part + [""] * (width - len(part)))
+        rows.append(row)
+
+    # the third row holds the Standort names, the last column is not needed
+    header = rows[2][:-1]
+    standorte = header[1:]
+
+    labels, values = [], []
+    for row in rows[3:]:
+        label = POINTS_COLUMN if row[0] in BROKEN_POINTS_COLUMNS else row[0]
+        labels.append(label)
+        values.append(row[1 : len(header)])
+
+    last_index = labels.index(LAST_STATISTIC)
+    modules = labels[last_index + 1 :]
+
+    parsed_df = pd.DataFrame(
+        {
+            label: [to_number(value) for value in row_values]
+            for label, row_values in zip(labels[: last_index + 1], values)
+        },
+        index=pd.Index(standorte, name=None),
+    )
+    parsed_df["Standort"] = parsed_df.index
+    return parsed_df, modules
+
+
+def benchmark(paths: list[str], repeat: int = 3) -> dict:
+    """Time parse_xls against the pd.read_html based parse_dataframe on the given files.
+
+    Both parsers have to produce the same Standorte, columns and values.
+    """
+    converter = importlib.import_module("2_convert_xls_to_csv")
+
+    timings = {}
+    for name, parser in [
+        ("pd.read_html", converter.parse_dataframe),
+        ("iterparse", parse_xls),
+    ]:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results = [parser(path) for path in paths]
+            best = min(best, time.perf_counter() - start)
+        timings[name] = (best, results)
+
+    for path, (expected_df, expected_modules), (parsed_df, modules) in zip(
+        paths, timings["pd.read_html"][1], timings["iterparse"][1]
+    ):
+        pd.testing.assert_frame_equal(
+            parsed_df.reset_index(drop=True),
+            expected_df.reset_index(drop=True).astype(parsed_df.dtypes.to_dict()),
+            check_names=False,
+        )
+        assert modules == expected_modules, f"Different modules in {path}"
+
+    return {name: seconds for name, (seconds, _) in timings.items()}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "paths",
+        nargs="+",
+        help="xls files or folders that are searched recursively for xls files",
+    )
+    parser.add_argument(
+        "--benchmark", action="store_true", help="Compare with pd.read_html"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Benchmark repetitions, the best is reported",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    paths = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            paths.extend(
+                sorted(glob.glob(os.path.join(path, "**", "*.xls"), recursive=True))
+            )
+        else:
+            paths.append(path)
+
+    if args.benchmark:
+        timings = benchmark(paths, args.repeat)
+        for name, seconds in timings.items():
+            print(
+                f"{name:>12}: {seconds:.3f} s for {len(paths)} files ({seconds / len(paths) * 1000:.2f} ms per file)"
+            )
+        print(f"Speedup: {timings['pd.read_html'] / timings['iterparse']:.1f}x")
+    else:
+        for path in paths:
+            parsed_df, modules = parse_xls(path)
+            print(path)
+            print(parsed_df)
@@ -1,23 +1,84 @@
 import sys
 import os
-from dash import Dash, html, dcc, Input, Output, State, callback_context
+from urllib.parse import urlencode
+import diskcache
+from dash import (
+    Dash,
+    DiskcacheManager,
+    html,
+    dcc,
+    Input,
+    Output,
+    State,
+    Patch,
+    ClientsideFunction,
+    callback_context,
+)
 import dash_bootstrap_components as dbc
 from dash.exceptions import PreventUpdate
-import traceback
-import plotly.express as px
-import pandas as pd
 
 # Add the root directory of the project to the Python path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../")))
 
+from src.backend.aggregates import AVERAGE_COLUMNS, NATIONAL_SCOPE, get_aggregate
+from src.backend.catalog import DATA_PATH, get_catalog_entry, load_catalog
 from src.backend.data_functions import (
-    get_all_semesters,
-    get_berufe_for_semester,
+    compare_semesters,
+    get_beruf_history,
+    get_beruf_options,
+    get_beruf_semesters,
+    get_beruf_standorte,
     get_dataframe,
+    get_source_signature,
 )
+from src.backend.table_query import filter_dataframe, get_page, sort_dataframe
+from src.backend.trends import derived_columns, get_trend_standorte, get_trends
 
+import downloads
+from figure_cache import FigureCache
+from instrumentation import init_app, instrument_callback
 from pages.home_page import create_home_layout
 from pages.data_page import create_data_layout
+from pages.semestervergleich_page import create_semestervergleich_layout
+from pages.trends_page import create_trends_layout
+
+# Background callbacks run in their own process and store their progress and results
+# on the local disk. The callbacks reuse the loaded data through run_once, whose keys
+# include the files it was computed from, so the manager does not cache the outputs.
+BACKGROUND_CACHE_PATH = os.environ.get(
+    "IHK_BACKGROUND_CACHE_PATH", os.path.join(DATA_PATH, "cache", "background")
+)
+BACKGROUND_RESULT_EXPIRE = 60 * 60
+background_cache = diskcache.Cache(BACKGROUND_CACHE_PATH)
+background_callback_manager = DiskcacheManager(
+    background_cache, expire=BACKGROUND_RESULT_EXPIRE
+)
+
+
+def run_once(key: tuple, sources: list[tuple[str, str]], compute):
+    """
+    Run compute() once for identical concurrent requests of all processes.
+
+    The first caller computes the result while the others wait for the lock
+    and then take the stored result. The result is stored for the catalog version
+    and the signatures of the (semester, beruf) files in sources, so it is computed
+    again when one of them changes.
+    """
+    signatures = tuple(
+        get_source_signature(semester, beruf) for semester, beruf in sources
+    )
+    key = (load_catalog()["version"], signatures) + key
+    with diskcache.Lock(
+        background_cache, ("lock",) + key, expire=BACKGROUND_RESULT_EXPIRE
+    ):
+        result = background_cache.get(("result",) + key)
+        if result is None:
+            result = compute()
+            background_cache.set(
+                ("result",) + key, result, expire=BACKGROUND_RESULT_EXPIRE
+            )
+    return result
+
 
 # Initialize the Dash app with Bootstrap CSS and Font Awesome
 app = Dash(
@@ -28,7 +89,17 @@ app = Dash(
         "/assets/custom.css",
     ],
     suppress_callback_exceptions=True,
+    background_callback_manager=background_callback_manager,
 )
+# Flask server for gunicorn (see gunicorn.conf.py)
+server = app.server
+# callback timings on /metrics and optional profiling (see instrumentation.py)
+init_app(app)
+# streamed downloads on /export (see downloads.py)
+downloads.init_app(app)
+
+# figure specs of the bar plot, shared by all sessions
+figure_cache = FigureCache()
 
 # Sidebar layout
 sidebar = html.Div(
@@ -67,6 +138,15 @@ sidebar = html.Div(
                     id="semestervergleich-link",
                     active="exact",
                 ),
+                dbc.NavLink(
+                    [
+                        html.I(className="fas fa-chart-line me-2"),
+                        html.Span("Trends"),
+                    ],
+                    href="/trends",
+                    id="trends-link",
+                    active="exact",
+                ),
             ],
             vertical=True,
             pills=True,
@@ -101,6 +181,7 @@ app.layout = html.Div(
     Input("sidebar-toggle", "n_clicks"),
     State("sidebar", "className"),
 )
+@instrument_callback
 def toggle_sidebar(n_clicks, sidebar_class):
     if n_clicks and "collapsed" not in sidebar_class:
         return "sidebar collapsed", "content-container expanded", "fas fa-chevron-right"
@@ -111,140 +192,572 @@ def toggle_sidebar(n_clicks, sidebar_class):
     Output("page-content", "children"),
     Output("home-link", "active"),
     Output("data-link", "active"),
+    Output("semestervergleich-link", "active"),
+    Output("trends-link", "active"),
     Input("url", "pathname"),
 )
+@instrument_callback
 def render_page_content(pathname):
     if pathname == "/" or pathname == "":
-        return create_home_layout(), True, False
+        return create_home_layout(), True, False, False, False
     elif pathname == "/data":
-        return create_data_layout(), False, True
-    return html.Div("404 - Not found", className="error-message"), False, False
+        return create_data_layout(), False, True, False, False
+    elif pathname == "/semestervergleich":
+        return create_semestervergleich_layout(), False, False, True, False
+    elif pathname == "/trends":
+        return create_trends_layout(), False, False, False, True
+    return (
+        html.Div("404 - Not found", className="error-message"),
+        False,
+        False,
+        False,
+        False,
+    )
+
+
+def get_table_frame(frame_key, selected_column, sort_by, filter_query):
+    """
+    Get the filtered and sorted frame shown in the table and the plot.
+    Sorted descending by the selected column unless the table is sorted.
+    """
+    df = get_dataframe(frame_key["semester"], frame_key["beruf"])
+    return sort_dataframe(filter_dataframe(df, filter_query), sort_by, selected_column)
+
+
+def get_reference_lines(frame_key, selected_column):
+    """
+    Shapes and annotations of a dashed line at the bundesweit aggregate of the selected column.
+    Counts have no comparable aggregate and get no line.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    aggregate = get_aggregate(frame_key["semester"], frame_key["beruf"])
+    if aggregate is not None and selected_column in AVERAGE_COLUMNS:
+        fig.add_hline(
+            y=aggregate[selected_column],
+            line_dash="dash",
+            annotation_text=f"{NATIONAL_SCOPE}: {aggregate[selected_column]}",
+        )
+    return (
+        [shape.to_plotly_json() for shape in fig.layout.shapes],
+        [annotation.to_plotly_json() for annotation in fig.layout.annotations],
+    )
+
+
+def create_barplot(df, selected_column, frame_key):
+    """
+    Bar plot of all Standorte of df in table order.
+    The selection and the shortened x-axis labels are applied in the browser (assets/clientside.js).
+    """
+    # plotly.express imports pandas and all chart types, it is only loaded when the first figure is built
+    import plotly.express as px
+
+    standort_order = df["Standort"].tolist()
+
+    fig = px.bar(
+        df,
+        x="Standort",
+        y=selected_column,
+        category_orders={"Standort": standort_order},
+    )
+    fig.update_layout(
+        xaxis_title="Standort",
+        yaxis_title=selected_column,
+        xaxis_tickangle=-45,
+        margin=dict(b=150),  # Increase bottom margin to accommodate rotated labels
+    )
+    shapes, annotations = get_reference_lines(frame_key, selected_column)
+    fig.update_layout(shapes=shapes, annotations=annotations)
+    fig.update_traces(texttemplate="%{y}", textposition="outside")
+    return fig
+
+
+@app.callback(
+    Output("frame-key", "data"),
+    Input("semester-dropdown", "value"),
+    Input("beruf-dropdown", "value"),
+)
+@instrument_callback
+def set_frame_key(selected_semester, selected_beruf):
+    # the beruf value can still belong to the previous semester until its options are updated
+    if not selected_semester or not selected_beruf:
+        raise PreventUpdate
+    if get_catalog_entry(selected_semester, selected_beruf) is None:
+        raise PreventUpdate
+    return {"semester": selected_semester, "beruf": selected_beruf}
+
+
+def get_all_standorte(frame_key):
+    return get_dataframe(
+        frame_key["semester"], frame_key["beruf"], columns=["Standort"]
+    )["Standort"].tolist()
 
 
 @app.callback(
     Output("beruf-table", "data"),
     Output("beruf-table", "columns"),
+    Output("beruf-table", "page_count"),
     Output("beruf-table", "selected_rows"),
-    Output("standort-barplot", "figure"),
-    Input("semester-dropdown", "value"),
-    Input("beruf-dropdown", "value"),
+    Output("table-view", "data"),
+    Input("frame-key", "data"),
     Input("column-dropdown", "value"),
+    Input("beruf-table", "page_current"),
+    Input("beruf-table", "page_size"),
     Input("beruf-table", "sort_by"),
-    Input("beruf-table", "derived_virtual_selected_rows"),
-    Input("beruf-table", "derived_virtual_data"),
+    Input("beruf-table", "filter_query"),
+    State("selected-standorte", "data"),
 )
-def update_table_and_plot(
-    selected_semester,
-    selected_beruf,
+@instrument_callback
+def update_table(
+    frame_key,
     selected_column,
+    page_current,
+    page_size,
     sort_by,
-    selected_rows,
-    virtual_data,
+    filter_query,
+    selection,
 ):
-    ctx = callback_context
-    triggered_id = ctx.triggered[0]["prop_id"].split(".")[0] if ctx.triggered else None
-
-    print(
-        f"Callback triggered. Semester: {selected_semester}, Beruf: {selected_beruf}, Column: {selected_column}"
-    )
-
-    try:
-        if not all([selected_semester, selected_beruf, selected_column]):
-            print("Not all required inputs are available. Raising PreventUpdate.")
-            raise PreventUpdate
-
-        df = get_dataframe(selected_semester, selected_beruf)
-        print(f"Dataframe loaded. Shape: {df.shape}")
-
-        if df.empty:
-            print("Dataframe is empty. Raising PreventUpdate.")
-            raise PreventUpdate
-
-        # Sort the dataframe based on the selected column in descending order
-        df = df.sort_values(by=selected_column, ascending=False)
-
-        # Apply table sorting if it exists
-        if sort_by:
-            df = df.sort_values(
-                by=sort_by[0]["column_id"], ascending=sort_by[0]["direction"] == "asc"
-            )
+    if not frame_key:
+        raise PreventUpdate
+    df = get_table_frame(frame_key, selected_column, sort_by, filter_query)
+
+    # Only the current page of the table is sent to the browser.
+    # The checkboxes of the page are set from the selected Standorte of the whole dataframe,
+    # a new dataframe starts with all of them selected
+    page_df, page_count = get_page(df, page_current, page_size)
+    table_data = page_df.assign(id=page_df["Standort"]).to_dict("records")
+    table_columns = [{"name": i, "id": i} for i in df.columns]
+    if selection is None or selection["frame_key"] != frame_key:
+        selected_rows = list(range(len(page_df)))
+    else:
+        selected = set(selection["standorte"])
+        selected_rows = [
+            i for i, standort in enumerate(page_df["Standort"]) if standort in selected
+        ]
+    table_view = {
+        "frame_key": frame_key,
+        "page_current": page_current,
+        "sort_by": sort_by,
+        "filter_query": filter_query,
+    }
+    return table_data, table_columns, page_count, selected_rows, table_view
 
-        # Set all rows as selected by default
-        if selected_rows is None or len(selected_rows) == 0:
-            selected_rows = list(range(len(df)))
 
-        # Filter rows based on selection
-        df_filtered = df.iloc[selected_rows] if selected_rows else df
+@app.callback(
+    Output("selected-standorte", "data"),
+    Input("frame-key", "data"),
+    Input("beruf-table", "selected_rows"),
+    State("beruf-table", "data"),
+    State("table-view", "data"),
+    State("beruf-table", "page_current"),
+    State("beruf-table", "sort_by"),
+    State("beruf-table", "filter_query"),
+    State("selected-standorte", "data"),
+)
+@instrument_callback
+def update_selection(
+    frame_key,
+    selected_rows,
+    table_data,
+    table_view,
+    page_current,
+    sort_by,
+    filter_query,
+    selection,
+):
+    if not frame_key:
+        raise PreventUpdate
+    # Set all rows as selected by default when a new dataframe is loaded
+    triggered_ids = {
+        trigger["prop_id"].split(".")[0] for trigger in callback_context.triggered
+    }
+    if (
+        "frame-key" in triggered_ids
+        or selection is None
+        or selection["frame_key"] != frame_key
+    ):
+        return {"frame_key": frame_key, "standorte": get_all_standorte(frame_key)}
+
+    # The table clears its checkboxes when it is paged, sorted or filtered,
+    # before update_table has sent the new page. Only clicks on the current page are merged.
+    current_view = {
+        "frame_key": frame_key,
+        "page_current": page_current,
+        "sort_by": sort_by,
+        "filter_query": filter_query,
+    }
+    if table_view != current_view:
+        raise PreventUpdate
+    page_standorte = [row["Standort"] for row in table_data or []]
+    checked = {
+        page_standorte[i] for i in selected_rows or [] if i < len(page_standorte)
+    }
+    standorte = [
+        standort
+        for standort in selection["standorte"]
+        if standort not in page_standorte or standort in checked
+    ]
+    standorte += [
+        standort
+        for standort in page_standorte
+        if standort in checked and standort not in standorte
+    ]
+    if standorte == selection["standorte"]:
+        raise PreventUpdate
+    return {"frame_key": frame_key, "standorte": standorte}
 
-        # Ensure the order of Standorte in the plot matches the table
-        standort_order = df_filtered["Standort"].tolist()
 
-        # Update table
-        table_data = df.to_dict("records")
-        table_columns = [{"name": i, "id": i} for i in df.columns]
+@app.callback(
+    Output("barplot-figure", "data"),
+    Input("frame-key", "data"),
+    Input("column-dropdown", "value"),
+    Input("beruf-table", "sort_by"),
+    Input("beruf-table", "filter_query"),
+)
+@instrument_callback
+def update_plot(frame_key, selected_column, sort_by, filter_query):
+    if not frame_key or not selected_column:
+        raise PreventUpdate
 
-        # Update plot
-        fig = px.bar(
-            df_filtered,
-            x="Standort",
-            y=selected_column,
-            category_orders={"Standort": standort_order},
+    # A new dataframe gets a new figure, everything else only patches the bars
+    triggered_ids = {
+        trigger["prop_id"].split(".")[0] for trigger in callback_context.triggered
+    }
+    if not triggered_ids or "frame-key" in triggered_ids:
+        key = (
+            load_catalog()["version"],
+            frame_key["semester"],
+            frame_key["beruf"],
+            selected_column,
+            tuple((sort["column_id"], sort["direction"]) for sort in sort_by or []),
+            filter_query or "",
         )
-        fig.update_layout(
-            xaxis_title="Standort",
-            yaxis_title=selected_column,
-            xaxis_tickangle=-45,
-            margin=dict(b=150),  # Increase bottom margin to accommodate rotated labels
+        return figure_cache.get_or_create(
+            key,
+            lambda: create_barplot(
+                get_table_frame(frame_key, selected_column, sort_by, filter_query),
+                selected_column,
+                frame_key,
+            ),
         )
-        fig.update_traces(texttemplate="%{y}", textposition="outside")
 
-        # Cut x-axis labels to first 10 characters and add "..." if longer
-        fig.update_xaxes(
-            ticktext=[
-                standort[:10] + "..." if len(standort) > 10 else standort
-                for standort in standort_order
-            ],
-            tickvals=standort_order,
-        )
-
-        print("Table and plot updated successfully.")
-        return table_data, table_columns, selected_rows, fig
-    except Exception as e:
-        print(f"Error in update_table_and_plot: {str(e)}")
-        print(traceback.format_exc())
-        raise
+    df = get_table_frame(frame_key, selected_column, sort_by, filter_query)
+    standort_order = df["Standort"].tolist()
+    patched_figure = Patch()
+    patched_figure["data"][0]["x"] = standort_order
+    patched_figure["data"][0]["y"] = df[selected_column].tolist()
+    patched_figure["data"][0][
+        "hovertemplate"
+    ] = f"Standort=%{{x}}<br>{selected_column}=%{{y}}<extra></extra>"
+    patched_figure["layout"]["xaxis"]["categoryarray"] = standort_order
+    patched_figure["layout"]["yaxis"]["title"]["text"] = selected_column
+    shapes, annotations = get_reference_lines(frame_key, selected_column)
+    patched_figure["layout"]["shapes"] = shapes
+    patched_figure["layout"]["annotations"] = annotations
+    return patched_figure
+
+
+# Showing only the selected rows needs no round trip to the server
+app.clientside_callback(
+    ClientsideFunction(namespace="barplot", function_name="filterSelection"),
+    Output("standort-barplot", "figure"),
+    Input("barplot-figure", "data"),
+    Input("selected-standorte", "data"),
+)
 
 
 @app.callback(
     Output("column-dropdown", "options"),
-    Input("semester-dropdown", "value"),
-    Input("beruf-dropdown", "value"),
+    Input("frame-key", "data"),
 )
-def set_column_options(selected_semester, selected_beruf):
-    if not selected_semester or not selected_beruf:
+@instrument_callback
+def set_column_options(frame_key):
+    if not frame_key:
         raise PreventUpdate
-    df = get_dataframe(selected_semester, selected_beruf)
+    # the columns are known from the catalog, the frame is not needed
+    columns = get_catalog_entry(frame_key["semester"], frame_key["beruf"])["columns"]
     return [
-        {"label": column, "value": column}
-        for column in df.columns
-        if column != "Standort"
+        {"label": column, "value": column} for column in columns if column != "Standort"
     ]
 
 
+@app.callback(
+    Output("export-from-dropdown", "value"),
+    Output("export-to-dropdown", "value"),
+    Output("export-beruf-dropdown", "value"),
+    Input("frame-key", "data"),
+)
+@instrument_callback
+def set_export_selection(frame_key):
+    # the export follows the shown dataframe until it is changed
+    if not frame_key:
+        raise PreventUpdate
+    return frame_key["semester"], frame_key["semester"], [frame_key["beruf"]]
+
+
+@app.callback(
+    Output("export-link", "href"),
+    Output("export-link", "disabled"),
+    Input("export-from-dropdown", "value"),
+    Input("export-to-dropdown", "value"),
+    Input("export-beruf-dropdown", "value"),
+    Input("export-column-dropdown", "value"),
+    Input("export-format", "value"),
+    Input("selected-standorte", "data"),
+    Input("beruf-table", "filter_query"),
+    State("frame-key", "data"),
+)
+@instrument_callback
+def update_export_link(
+    from_semester,
+    to_semester,
+    berufe,
+    columns,
+    export_format,
+    selection,
+    filter_query,
+    frame_key,
+):
+    if not from_semester or not berufe:
+        return None, True
+    params = {
+        "format": export_format,
+        "from": from_semester,
+        "to": to_semester or from_semester,
+        "beruf": berufe,
+        "column": columns or [],
+        "filter": filter_query or "",
+    }
+    # the Standorte are only restricted when some of them are deselected in the table
+    entry = (
+        get_catalog_entry(frame_key["semester"], frame_key["beruf"])
+        if frame_key
+        else None
+    )
+    if (
+        entry is not None
+        and selection is not None
+        and set(selection["standorte"]) != set(entry["standorte"])
+    ):
+        params["standort"] = selection["standorte"]
+    return app.get_relative_path("/export") + "?" + urlencode(params, doseq=True), False
+
+
 @app.callback(Output("beruf-dropdown", "options"), Input("semester-dropdown", "value"))
+@instrument_callback
 def set_beruf_options(selected_semester):
     if not selected_semester:
         raise PreventUpdate
-    return [
-        {"label": beruf, "value": beruf}
-        for beruf in get_berufe_for_semester(selected_semester)
-    ]
+    return get_beruf_options(selected_semester)
 
 
 @app.callback(Output("beruf-dropdown", "value"), Input("beruf-dropdown", "options"))
+@instrument_callback
 def set_beruf_value(available_options):
     return available_options[0]["value"] if available_options else None
 
 
+@app.callback(
+    Output("vergleich-from-dropdown", "options"),
+    Output("vergleich-from-dropdown", "value"),
+    Output("vergleich-to-dropdown", "options"),
+    Output("vergleich-to-dropdown", "value"),
+    Output("vergleich-standort-dropdown", "options"),
+    Input("vergleich-beruf-dropdown", "value"),
+    State("vergleich-from-dropdown", "value"),
+    State("vergleich-to-dropdown", "value"),
+)
+@instrument_callback
+def set_vergleich_options(selected_beruf, from_semester, to_semester):
+    if not selected_beruf:
+        raise PreventUpdate
+    semesters = get_beruf_semesters(selected_beruf)
+    semester_options = [
+        {"label": semester, "value": semester} for semester in semesters
+    ]
+    # keep the selected semesters if the new beruf has them, otherwise compare the oldest with the newest
+    from_semester = from_semester if from_semester in semesters else semesters[0]
+    to_semester = to_semester if to_semester in semesters else semesters[-1]
+    standort_options = [
+        {"label": standort, "value": standort}
+        for standort in get_beruf_standorte(selected_beruf)
+    ]
+    return (
+        semester_options,
+        from_semester,
+        semester_options,
+        to_semester,
+        standort_options,
+    )
+
+
+# The views over all semesters run as background callbacks, so they never block a worker thread.
+# A new request of the same callback (e.g. another beruf) cancels the running one, leaving the page cancels both.
+# Their jobs run in another process, so they are not timed by instrument_callback, only their requests are.
+@app.callback(
+    Output("vergleich-lineplot", "figure"),
+    Input("vergleich-beruf-dropdown", "value"),
+    Input("vergleich-column-dropdown", "value"),
+    Input("vergleich-standort-dropdown", "value"),
+    background=True,
+    cancel=[Input("url", "pathname")],
+)
+def update_vergleich_plot(selected_beruf, selected_column, selected_standorte):
+    if not selected_beruf or not selected_column:
+        raise PreventUpdate
+    import plotly.express as px
+
+    history = run_once(
+        ("history", selected_beruf),
+        [
+            (semester, selected_beruf)
+            for semester in get_beruf_semesters(selected_beruf)
+        ],
+        lambda: get_beruf_history(selected_beruf),
+    )
+    df = history[history["Standort"].isin(selected_standorte or [])]
+    fig = px.line(
+        df,
+        x=df["semester"].astype(str),
+        y=selected_column,
+        color=df["Standort"].astype(str),
+        markers=True,
+        category_orders={"x": list(history["semester"].cat.categories)},
+    )
+    fig.update_layout(
+        xaxis_title="Semester", yaxis_title=selected_column, legend_title="Standort"
+    )
+    fig.update_xaxes(type="category")
+    return fig
+
+
+@app.callback(
+    Output("vergleich-table", "data"),
+    Output("vergleich-table", "columns"),
+    Output("vergleich-table", "sort_by"),
+    Input("vergleich-beruf-dropdown", "value"),
+    Input("vergleich-from-dropdown", "value"),
+    Input("vergleich-to-dropdown", "value"),
+    Input("vergleich-column-dropdown", "value"),
+    background=True,
+    progress=[
+        Output("vergleich-progress", "value"),
+        Output("vergleich-progress", "max"),
+    ],
+    running=[
+        (
+            Output("vergleich-progress", "style"),
+            {"visibility": "visible"},
+            {"visibility": "hidden"},
+        )
+    ],
+    cancel=[Input("url", "pathname")],
+)
+def update_vergleich_table(
+    set_progress, selected_beruf, from_semester, to_semester, selected_column
+):
+    if not selected_beruf or not from_semester or not to_semester:
+        raise PreventUpdate
+    semesters = get_beruf_semesters(selected_beruf)
+    # the semester values can still belong to the previous beruf until its options are updated
+    if from_semester not in semesters or to_semester not in semesters:
+        raise PreventUpdate
+    comparison = run_once(
+        ("comparison", selected_beruf, from_semester, to_semester),
+        [(from_semester, selected_beruf), (to_semester, selected_beruf)],
+        lambda: compare_semesters(
+            selected_beruf,
+            from_semester,
+            to_semester,
+            progress=lambda loaded, total: set_progress((loaded, total)),
+        ),
+    )
+    table_columns = [{"name": column, "id": column} for column in comparison.columns]
+    sort_by = (
+        [{"column_id": f"Δ {selected_column}", "direction": "desc"}]
+        if selected_column
+        else []
+    )
+    return comparison.to_dict("records"), table_columns, sort_by
+
+
+@app.callback(
+    Output("trend-standort-dropdown", "options"),
+    Output("trend-standort-dropdown", "value"),
+    Input("trend-beruf-dropdown", "value"),
+    State("trend-standort-dropdown", "value"),
+)
+@instrument_callback
+def set_trend_options(selected_beruf, selected_standorte):
+    if not selected_beruf:
+        raise PreventUpdate
+    standorte = get_trend_standorte(selected_beruf)
+    # keep the selected Standorte the new beruf has, otherwise compare the first Standort with bundesweit
+    selected_standorte = [
+        standort for standort in selected_standorte or [] if standort in standorte
+    ]
+    if not selected_standorte:
+        selected_standorte = [
+            standort for standort in standorte if standort != NATIONAL_SCOPE
+        ][:1]
+        selected_standorte += [NATIONAL_SCOPE] if NATIONAL_SCOPE in standorte else []
+    return [
+        {"label": standort, "value": standort} for standort in standorte
+    ], selected_standorte
+
+
+@app.callback(
+    Output("trend-lineplot", "figure"),
+    Output("trend-table", "data"),
+    Output("trend-table", "columns"),
+    Input("trend-beruf-dropdown", "value"),
+    Input("trend-standort-dropdown", "value"),
+    Input("trend-column-dropdown", "value"),
+)
+@instrument_callback
+def update_trend_view(selected_beruf, selected_standorte, selected_column):
+    if not selected_beruf or not selected_column:
+        raise PreventUpdate
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    # precomputed series, no csv file is read
+    trends = get_trends(selected_beruf, selected_standorte or [])
+    mean_column, delta_column, z_column = derived_columns(selected_column)
+
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, (standort, series) in enumerate(trends.groupby("Standort", sort=False)):
+        color = colors[i % len(colors)]
+        fig.add_scatter(
+            x=series["semester"],
+            y=series[selected_column],
+            name=standort,
+            mode="lines+markers",
+            line_color=color,
+            legendgroup=standort,
+        )
+        fig.add_scatter(
+            x=series["semester"],
+            y=series[mean_column],
+            name=f"{standort} (Mittel)",
+            mode="lines",
+            line=dict(color=color, dash="dash"),
+            legendgroup=standort,
+            showlegend=False,
+        )
+    fig.update_layout(
+        xaxis_title="Semester", yaxis_title=selected_column, legend_title="Standort"
+    )
+    fig.update_xaxes(type="category", categoryorder="category ascending")
+
+    table = trends[
+        ["Standort", "semester", selected_column, mean_column, delta_column, z_column]
+    ].rename(columns={mean_column: "Mittel", delta_column: "Δ", z_column: "z"})
+    table_columns = [{"name": column, "id": column} for column in table.columns]
+    return fig, table.to_dict("records"), table_columns
+
+
 if __name__ == "__main__":
     app.run_server(debug=True)
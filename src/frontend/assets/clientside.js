@@ -0,0 +1,40 @@
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    barplot: {
+        /*
+         * Show only the selected Standorte of the full bar plot in the browser.
+         * The selection is the selected-standorte store of the whole dataframe.
+         * The order of the table is kept and the x-axis labels are cut to
+         * 10 characters.
+         */
+        filterSelection: function (figure, selection) {
+            if (!figure) {
+                return window.dash_clientside.no_update;
+            }
+            const selectedIds = selection && selection.standorte;
+            const selected = selectedIds && selectedIds.length ? new Set(selectedIds) : null;
+            const trace = figure.data[0];
+            const x = [];
+            const y = [];
+            trace.x.forEach(function (standort, i) {
+                if (!selected || selected.has(standort)) {
+                    x.push(standort);
+                    y.push(trace.y[i]);
+                }
+            });
+            const ticktext = x.map(function (standort) {
+                return standort.length > 10 ? standort.slice(0, 10) + "..." : standort;
+            });
+
+            return {
+                data: [Object.assign({}, trace, { x: x, y: y })].concat(figure.data.slice(1)),
+                layout: Object.assign({}, figure.layout, {
+                    xaxis: Object.assign({}, figure.layout.xaxis, {
+                        categoryarray: x,
+                        tickvals: x,
+                        ticktext: ticktext,
+                    }),
+                }),
+            };
+        },
+    },
+});
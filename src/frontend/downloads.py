@@ -0,0 +1,56 @@
+""" /export endpoint that streams a selection of the stats as a download.
+
+    /export?format=csv&from=20232&to=20242&beruf=<slug>&beruf=<slug>&standort=Berlin&column=Bestehensquote&filter=...
+
+beruf can be repeated, standort and column are optional (all if missing) and filter is a
+DataTable filter_query. The file is sent in chunks while it is written (see src/backend/export.py).
+"""
+
+from flask import Response, request, stream_with_context
+
+from src.backend.export import EXPORT_FORMATS, ExportSelection, stream_export
+
+
+def get_selection() -> ExportSelection:
+    """Read the selection from the query string, raises ValueError if it is incomplete."""
+    from_semester = request.args.get("from")
+    to_semester = request.args.get("to", from_semester)
+    berufe = tuple(request.args.getlist("beruf"))
+    if not from_semester or not berufe:
+        raise ValueError("from and at least one beruf are required")
+    return ExportSelection(
+        from_semester=from_semester,
+        to_semester=to_semester,
+        berufe=berufe,
+        standorte=tuple(request.args.getlist("standort")) or None,
+        columns=tuple(request.args.getlist("column")) or None,
+        filter_query=request.args.get("filter", ""),
+    )
+
+
+def init_app(app) -> None:
+    """
+    Register the /export endpoint on the Flask server of a Dash app.
+    """
+
+    @app.server.route("/export")
+    def export():
+        export_format = request.args.get("format", "csv")
+        try:
+            selection = get_selection()
+            chunks = stream_export(selection, export_format)
+        except ValueError as error:
+            return Response(f"{error}\n", status=400, mimetype="text/plain")
+
+        mimetype, extension = EXPORT_FORMATS[export_format]
+        low, high = sorted([selection.from_semester, selection.to_semester])
+        filename = (
+            f"ihk-berufsstatistik-{low}-{high}.{extension}"
+            if low != high
+            else f"ihk-berufsstatistik-{low}.{extension}"
+        )
+        return Response(
+            stream_with_context(chunks),
+            mimetype=mimetype,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        )
@@ -0,0 +1,83 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import plotly.io as pio
+
+from src.backend.metrics import record_cache
+from src.backend.shared_cache import get_shared_cache
+
+# maximum size of all cached figure specs in bytes of their JSON
+FIGURE_CACHE_BYTES = int(os.environ.get("FIGURE_CACHE_BYTES", 32 * 1024 * 1024))
+
+
+class FigureCache:
+    """
+    Thread-safe LRU cache for figure specs, bounded by the size of their JSON.
+
+    Figures are stored as plain dicts, so a hit is returned to Dash without
+    building the figure again. Entries are shared by all sessions of the process;
+    with a shared cache a figure built by another worker is loaded from disk
+    into a copy of this process.
+    """
+
+    def __init__(self, max_bytes: int = FIGURE_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, key: tuple, create) -> dict:
+        """
+        Return the cached figure spec for key or build it with create() and cache it.
+        The returned dict is shared between callers and must not be modified.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                record_cache("figure", hit=True)
+                return entry[1]
+            self.misses += 1
+        record_cache("figure", hit=False)
+
+        # build outside of the lock so other figures are not blocked
+        shared_cache = get_shared_cache()
+        shared_key = ("figure", key)
+        figure_json = shared_cache.get(shared_key) if shared_cache is not None else None
+        if figure_json is None:
+            figure_json = pio.to_json(create(), validate=False)
+            if shared_cache is not None:
+                shared_cache.set(shared_key, figure_json)
+        spec = json.loads(figure_json)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = (len(figure_json), spec)
+                self.size += len(figure_json)
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, (size, _) = self._entries.popitem(last=False)
+                self.size -= size
+                self.evictions += 1
+        return spec
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
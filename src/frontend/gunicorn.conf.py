@@ -0,0 +1,51 @@
+""" gunicorn settings for running the dashboard in production.
+
+    cd src/frontend && gunicorn app:server
+
+Debug mode is off (app.run_server is not called). A csv file or figure is parsed
+or built once for all workers and pickled into a cache on the local disk
+(src/backend/shared_cache.py), every worker loads its own copy of the few entries
+it keeps in memory. If data/stats.arrow exists and was written for the current
+catalog, the frames are read from the memory-mapped file instead
+(src/backend/arrow_store.py).
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8050")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+timeout = 120
+
+# set before the app is imported, so every worker uses the same disk cache
+os.environ.setdefault(
+    "IHK_SHARED_CACHE_PATH",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "cache"
+    ),
+)
+os.environ.setdefault("DATAFRAME_CACHE_SIZE", "8")
+# with the Arrow file of 2_convert_xls_to_csv.py --arrow all workers map the same file instead of parsing csv files,
+# a file of an older catalog version is ignored until it is written again
+if os.path.exists(
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "stats.arrow"
+    )
+):
+    os.environ.setdefault("IHK_DATA_BACKEND", "arrow")
+os.environ.setdefault("FIGURE_CACHE_BYTES", str(4 * 1024 * 1024))
+
+
+def post_worker_init(worker):
+    # the app is imported without pandas and plotly.express, so a new worker is ready quickly;
+    # they are imported in the background before the first figure needs them
+    import importlib
+    import threading
+
+    def import_modules():
+        for module in ("pandas", "plotly.express"):
+            importlib.import_module(module)
+
+    threading.Thread(target=import_modules, daemon=True).start()
@@ -0,0 +1,172 @@
+""" Timing of the Dash callbacks, the /metrics endpoint and per-request profiling.
+
+Every callback in app.py that runs in the server process is decorated with
+instrument_callback, which records its wall time with the triggering prop_id and
+the returned rows. The request hooks add the time and the size of the serialized
+response per callback, so the difference shows the cost of serializing the outputs.
+
+Profiling is enabled with IHK_PROFILER=cprofile or IHK_PROFILER=pyinstrument.
+Requests with the header X-Profile (or ?profile=1) and a random fraction of the
+callback requests (IHK_PROFILE_SAMPLE_RATE) are then profiled and the profiles are
+written to IHK_PROFILE_PATH (.prof files for snakeviz or pstats, .html for pyinstrument).
+"""
+
+import functools
+import os
+import random
+import threading
+import time
+
+from dash import callback_context
+from dash.exceptions import PreventUpdate
+from flask import Response, g, request
+
+from src.backend.catalog import DATA_PATH
+from src.backend.metrics import (
+    CALLBACK_DURATION,
+    CALLBACK_ROWS,
+    REQUEST_DURATION,
+    RESPONSE_BYTES,
+    count_rows,
+    current_callback,
+    observe,
+    render_metrics,
+)
+
+PROFILER = os.environ.get("IHK_PROFILER", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("IHK_PROFILE_SAMPLE_RATE", 0))
+PROFILE_PATH = os.environ.get(
+    "IHK_PROFILE_PATH", os.path.join(DATA_PATH, "cache", "profiles")
+)
+CALLBACK_PATH = "/_dash-update-component"
+
+# only one request is profiled at a time, the profilers of concurrent requests would disturb each other
+_profile_lock = threading.Lock()
+
+
+def get_trigger() -> str:
+    """prop_id of the input that triggered the running callback, "initial" for the first call."""
+    try:
+        triggered = callback_context.triggered
+    except Exception:
+        # called directly, outside of a Dash request
+        return "none"
+    return triggered[0]["prop_id"] if triggered else "initial"
+
+
+def instrument_callback(func):
+    """
+    Record the wall time, the trigger, the outcome and the returned rows of a callback.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = current_callback.set(func.__name__)
+        trigger = get_trigger()
+        status = "error"
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+            status = "ok"
+        except PreventUpdate:
+            status = "prevented"
+            raise
+        finally:
+            observe(
+                CALLBACK_DURATION,
+                (func.__name__, trigger, status),
+                time.perf_counter() - start,
+            )
+            current_callback.reset(token)
+        rows = count_rows(result)
+        if rows is not None:
+            observe(CALLBACK_ROWS, (func.__name__,), rows)
+        return result
+
+    return wrapper
+
+
+def get_callback_name(app) -> str:
+    """Name of the callback function of the running callback request."""
+    body = request.get_json(silent=True) or {}
+    callback = app.callback_map.get(body.get("output"), {}).get("callback")
+    return getattr(callback, "__name__", "unknown")
+
+
+def start_profiler():
+    if PROFILER == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+    else:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def stop_profiler(profiler, name: str) -> None:
+    """Stop the profiler and write its profile to PROFILE_PATH."""
+    os.makedirs(PROFILE_PATH, exist_ok=True)
+    path = os.path.join(
+        PROFILE_PATH, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{name}"
+    )
+    if PROFILER == "pyinstrument":
+        profiler.stop()
+        with open(f"{path}.html", "w", encoding="utf-8") as file:
+            file.write(profiler.output_html())
+    else:
+        profiler.disable()
+        profiler.dump_stats(f"{path}.prof")
+
+
+def should_profile() -> bool:
+    if not PROFILER:
+        return False
+    if request.headers.get("X-Profile") or request.args.get("profile"):
+        return True
+    return request.path == CALLBACK_PATH and random.random() < PROFILE_SAMPLE_RATE
+
+
+def init_app(app) -> None:
+    """
+    Register the request hooks and the /metrics endpoint on the Flask server of a Dash app.
+    """
+    server = app.server
+
+    @server.before_request
+    def start_request():
+        g.request_start = time.perf_counter()
+        if should_profile() and _profile_lock.acquire(blocking=False):
+            g.profiler = start_profiler()
+
+    @server.after_request
+    def finish_request(response):
+        if request.path == CALLBACK_PATH:
+            name = get_callback_name(app)
+            observe(REQUEST_DURATION, (name,), time.perf_counter() - g.request_start)
+            if not response.is_streamed:
+                observe(
+                    RESPONSE_BYTES, (name,), response.calculate_content_length() or 0
+                )
+        else:
+            name = request.path.strip("/").replace("/", "-") or "index"
+
+        g.profile_name = name
+        return response
+
+    @server.teardown_request
+    def finish_profile(exception):
+        # also runs after errors, so the profiler lock is always released
+        profiler = g.pop("profiler", None)
+        if profiler is not None:
+            try:
+                stop_profiler(profiler, g.get("profile_name", "error"))
+            finally:
+                _profile_lock.release()
+
+    @server.route("/metrics")
+    def metrics():
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
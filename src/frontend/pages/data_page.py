@@ -1,32 +1,42 @@
 from dash import html, dcc, dash_table
 import dash_bootstrap_components as dbc
+from src.backend.catalog import cached_per_version, get_catalog_entry
 from src.backend.data_functions import (
+    get_all_beruf_options,
     get_all_semesters,
-    get_berufe_for_semester,
-    get_dataframe,
+    get_beruf_options,
 )
+from src.backend.export import has_xlsx_support
 
 
+@cached_per_version
 def create_data_layout():
+    # everything comes from the catalog, no csv file is read to build the page
     all_semesters = get_all_semesters()
     default_semester = all_semesters[0] if all_semesters else None
-    default_beruf = (
-        get_berufe_for_semester(default_semester)[0] if default_semester else None
-    )
-    default_df = (
-        get_dataframe(default_semester, default_beruf)
-        if default_semester and default_beruf
-        else None
-    )
-    default_column = (
-        default_df.columns[1]
-        if default_df is not None and len(default_df.columns) > 1
-        else None
+    beruf_options = get_beruf_options(default_semester) if default_semester else []
+    default_beruf = beruf_options[0]["value"] if beruf_options else None
+    columns = (
+        get_catalog_entry(default_semester, default_beruf)["columns"]
+        if default_beruf
+        else []
     )
+    default_column = columns[1] if len(columns) > 1 else None
+    semester_options = [
+        {"label": semester, "value": semester} for semester in all_semesters
+    ]
 
     return dbc.Container(
         [
             html.H1("IHK Berufsstatistik Dashboard", className="my-4"),
+            # (semester, beruf) of the loaded dataframe, shared by the table, plot and dropdown callbacks
+            dcc.Store(id="frame-key"),
+            # bar plot of all Standorte, the selected ones are shown by a clientside callback
+            dcc.Store(id="barplot-figure"),
+            # selected Standorte of the whole dataframe, the table only knows the checkboxes of its page
+            dcc.Store(id="selected-standorte"),
+            # frame key, page, sort and filter the rows in the table were sent for
+            dcc.Store(id="table-view"),
             dbc.Row(
                 [
                     dbc.Col(
@@ -34,10 +44,7 @@ def create_data_layout():
                             html.Label("Semester auswählen", className="form-label"),
                             dcc.Dropdown(
                                 id="semester-dropdown",
-                                options=[
-                                    {"label": semester, "value": semester}
-                                    for semester in all_semesters
-                                ],
+                                options=semester_options,
                                 value=default_semester,
                                 className="mb-3",
                             ),
@@ -49,14 +56,7 @@ def create_data_layout():
                             html.Label("Umschulung auswählen", className="form-label"),
                             dcc.Dropdown(
                                 id="beruf-dropdown",
-                                options=[
-                                    {"label": beruf, "value": beruf}
-                                    for beruf in get_berufe_for_semester(
-                                        default_semester
-                                    )
-                                ]
-                                if default_semester
-                                else [],
+                                options=beruf_options,
                                 value=default_beruf,
                                 className="mb-3",
                             ),
@@ -70,11 +70,9 @@ def create_data_layout():
                                 id="column-dropdown",
                                 options=[
                                     {"label": col, "value": col}
-                                    for col in default_df.columns
+                                    for col in columns
                                     if col != "Standort"
-                                ]
-                                if default_df is not None
-                                else [],
+                                ],
                                 value=default_column,
                                 className="mb-3",
                             ),
@@ -109,8 +107,16 @@ def create_data_layout():
                                 [
                                     dash_table.DataTable(
                                         id="beruf-table",
-                                        sort_action="native",
+                                        # paging, sorting and filtering happen on the server,
+                                        # only the visible page is sent to the browser
+                                        page_action="custom",
+                                        page_current=0,
+                                        page_size=20,
+                                        sort_action="custom",
                                         sort_mode="single",
+                                        sort_by=[],
+                                        filter_action="custom",
+                                        filter_query="",
                                         row_selectable="multi",
                                         style_table={"overflowX": "auto"},
                                         style_cell={"textAlign": "left"},
@@ -129,6 +135,103 @@ def create_data_layout():
                     ),
                 ]
             ),
+            # download of the selected semesters, berufe and columns,
+            # with the Standorte selected and the filter applied in the table
+            html.H4("Daten exportieren", className="mt-2 mb-3"),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Label("Von Semester", className="form-label"),
+                            dcc.Dropdown(
+                                id="export-from-dropdown",
+                                options=semester_options,
+                                value=default_semester,
+                                clearable=False,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=2,
+                    ),
+                    dbc.Col(
+                        [
+                            html.Label("Bis Semester", className="form-label"),
+                            dcc.Dropdown(
+                                id="export-to-dropdown",
+                                options=semester_options,
+                                value=default_semester,
+                                clearable=False,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=2,
+                    ),
+                    dbc.Col(
+                        [
+                            html.Label("Umschulungen", className="form-label"),
+                            dcc.Dropdown(
+                                id="export-beruf-dropdown",
+                                options=get_all_beruf_options(),
+                                value=[default_beruf] if default_beruf else [],
+                                multi=True,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=4,
+                    ),
+                    dbc.Col(
+                        [
+                            html.Label("Datenreihen", className="form-label"),
+                            dcc.Dropdown(
+                                id="export-column-dropdown",
+                                options=[
+                                    {"label": col, "value": col}
+                                    for col in columns
+                                    if col != "Standort"
+                                ],
+                                placeholder="Alle Datenreihen",
+                                multi=True,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=4,
+                    ),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        dbc.RadioItems(
+                            id="export-format",
+                            options=[
+                                {"label": "CSV", "value": "csv"},
+                                {"label": "Parquet", "value": "parquet"},
+                            ]
+                            # the Excel export needs the optional xlsxwriter
+                            + (
+                                [{"label": "Excel", "value": "xlsx"}]
+                                if has_xlsx_support()
+                                else []
+                            ),
+                            value="csv",
+                            inline=True,
+                        ),
+                        width="auto",
+                    ),
+                    dbc.Col(
+                        # a normal link, the browser downloads the streamed file
+                        dbc.Button(
+                            [html.I(className="fas fa-download me-2"), "Herunterladen"],
+                            id="export-link",
+                            external_link=True,
+                            color="primary",
+                        ),
+                        width="auto",
+                    ),
+                ],
+                align="center",
+                className="mb-5",
+            ),
         ],
         fluid=True,
     )
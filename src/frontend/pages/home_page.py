@@ -1,7 +1,11 @@
+import functools
+
 from dash import html
 import dash_bootstrap_components as dbc
 
 
+# the page has no data, it is built once
+@functools.cache
 def create_home_layout():
     return dbc.Container(
         [
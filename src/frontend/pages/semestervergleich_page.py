@@ -0,0 +1,150 @@
+from dash import html, dcc, dash_table
+import dash_bootstrap_components as dbc
+from src.backend.catalog import cached_per_version
+from src.backend.data_functions import (
+    COMPARISON_COLUMNS,
+    get_all_beruf_options,
+    get_beruf_semesters,
+)
+
+
+@cached_per_version
+def create_semestervergleich_layout():
+    beruf_options = get_all_beruf_options()
+    default_beruf = beruf_options[0]["value"] if beruf_options else None
+    semesters = get_beruf_semesters(default_beruf) if default_beruf else []
+    semester_options = [
+        {"label": semester, "value": semester} for semester in semesters
+    ]
+
+    return dbc.Container(
+        [
+            html.H1("Semestervergleich", className="my-4"),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Label("Umschulung auswählen", className="form-label"),
+                            dcc.Dropdown(
+                                id="vergleich-beruf-dropdown",
+                                options=beruf_options,
+                                value=default_beruf,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=6,
+                    ),
+                    dbc.Col(
+                        [
+                            html.Label("Datenreihe auswählen", className="form-label"),
+                            dcc.Dropdown(
+                                id="vergleich-column-dropdown",
+                                options=[
+                                    {"label": column, "value": column}
+                                    for column in COMPARISON_COLUMNS
+                                ],
+                                value=COMPARISON_COLUMNS[0],
+                                clearable=False,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=6,
+                    ),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Label("Standorte auswählen", className="form-label"),
+                            dcc.Dropdown(
+                                id="vergleich-standort-dropdown",
+                                multi=True,
+                                value=["bundesweit"],
+                                className="mb-3",
+                            ),
+                        ],
+                        width=12,
+                    ),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            dcc.Graph(
+                                id="vergleich-lineplot",
+                                config={"displaylogo": False},
+                                className="mb-4",
+                            ),
+                        ],
+                        width=12,
+                    ),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Label("Von Semester", className="form-label"),
+                            dcc.Dropdown(
+                                id="vergleich-from-dropdown",
+                                options=semester_options,
+                                value=semesters[0] if semesters else None,
+                                clearable=False,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=6,
+                    ),
+                    dbc.Col(
+                        [
+                            html.Label("Bis Semester", className="form-label"),
+                            dcc.Dropdown(
+                                id="vergleich-to-dropdown",
+                                options=semester_options,
+                                value=semesters[-1] if semesters else None,
+                                clearable=False,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=6,
+                    ),
+                ]
+            ),
+            # loading progress of the comparison, only visible while it runs
+            dbc.Progress(
+                id="vergleich-progress",
+                value=0,
+                max=1,
+                striped=True,
+                animated=True,
+                style={"visibility": "hidden"},
+                className="mb-3",
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Div(
+                                [
+                                    dash_table.DataTable(
+                                        id="vergleich-table",
+                                        # one row per Standort, small enough to sort in the browser
+                                        sort_action="native",
+                                        filter_action="native",
+                                        page_size=20,
+                                        style_table={"overflowX": "auto"},
+                                        style_cell={"textAlign": "left"},
+                                    )
+                                ],
+                                className="mb-4",
+                            ),
+                        ],
+                        width=12,
+                    ),
+                ]
+            ),
+        ],
+        fluid=True,
+    )
@@ -0,0 +1,111 @@
+from dash import html, dcc, dash_table
+import dash_bootstrap_components as dbc
+from src.backend.catalog import cached_per_version
+from src.backend.data_functions import get_all_beruf_options
+from src.backend.trends import TREND_COLUMNS
+
+
+@cached_per_version
+def create_trends_layout():
+    beruf_options = get_all_beruf_options()
+    default_beruf = beruf_options[0]["value"] if beruf_options else None
+
+    return dbc.Container(
+        [
+            html.H1("Trends", className="my-4"),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Label("Umschulung auswählen", className="form-label"),
+                            dcc.Dropdown(
+                                id="trend-beruf-dropdown",
+                                options=beruf_options,
+                                value=default_beruf,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=6,
+                    ),
+                    dbc.Col(
+                        [
+                            html.Label("Datenreihe auswählen", className="form-label"),
+                            dcc.Dropdown(
+                                id="trend-column-dropdown",
+                                options=[
+                                    {"label": column, "value": column}
+                                    for column in TREND_COLUMNS
+                                ],
+                                value="Bestehensquote",
+                                clearable=False,
+                                className="mb-3",
+                            ),
+                        ],
+                        md=6,
+                    ),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Label("Standorte auswählen", className="form-label"),
+                            dcc.Dropdown(
+                                id="trend-standort-dropdown",
+                                multi=True,
+                                className="mb-3",
+                            ),
+                        ],
+                        width=12,
+                    ),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            # values as solid lines, rolling means dashed
+                            dcc.Graph(
+                                id="trend-lineplot",
+                                config={"displaylogo": False},
+                                className="mb-4",
+                            ),
+                        ],
+                        width=12,
+                    ),
+                ]
+            ),
+            dbc.Row(
+                [
+                    dbc.Col(
+                        [
+                            html.Div(
+                                [
+                                    dash_table.DataTable(
+                                        id="trend-table",
+                                        sort_action="native",
+                                        page_size=20,
+                                        style_table={"overflowX": "auto"},
+                                        style_cell={"textAlign": "left"},
+                                        # Standorte far from the others in a semester
+                                        style_data_conditional=[
+                                            {
+                                                "if": {
+                                                    "filter_query": "{z} >= 2 || {z} <= -2",
+                                                    "column_id": "z",
+                                                },
+                                                "fontWeight": "bold",
+                                            }
+                                        ],
+                                    )
+                                ],
+                                className="mb-4",
+                            ),
+                        ],
+                        width=12,
+                    ),
+                ]
+            ),
+        ],
+        fluid=True,
+    )